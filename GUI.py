@@ -2,8 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import bisect
 import json
+import os
+import queue
+import threading
 import main  # Import the main scheduling logic (genetic_algorithm)
+from enrollment import ENROLLMENT_FILE, load_enrollment
 
 
 class UniversitySchedulerGUI:
@@ -37,6 +42,14 @@ class UniversitySchedulerGUI:
         self.student_info = None
         self.best_fitness = None
         self.course_entries = []
+        self.problem = None
+
+        # Solver runs in a worker thread and reports back through this queue
+        self.generations = 100
+        self.progress_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.solver_thread = None
+        self.plot_line = None
 
         self.setup_ui()
 
@@ -129,38 +142,69 @@ class UniversitySchedulerGUI:
             style="TButton"
         ).pack(side="left", padx=10)
 
+        # Progress bar, status and cancel button shown while the solver runs
+        self.progress_frame = ttk.Frame(self.result_frame)
+        self.progress_frame.pack(fill="x", padx=10)
+        self.progress = ttk.Progressbar(self.progress_frame, orient="horizontal", mode="determinate",
+                                        maximum=self.generations)
+        self.progress.pack(side="left", fill="x", expand=True, padx=5)
+        self.progress_label = ttk.Label(self.progress_frame, text="", font=("Arial", 10))
+        self.progress_label.pack(side="left", padx=5)
+        self.cancel_button = ttk.Button(
+            self.progress_frame,
+            text="Cancel",
+            command=self.cancel_schedule,
+            style="TButton"
+        )
+        self.cancel_button.pack(side="left", padx=5)
+
         # Timetable frame with scrollbars
         self.timetable_frame = ttk.Frame(self.result_frame)
 
-        # Create a canvas and scrollbars
-        self.table_canvas = tk.Canvas(self.timetable_frame, bg=self.bg_color)
-        self.h_scroll = ttk.Scrollbar(self.timetable_frame, orient="horizontal", command=self.table_canvas.xview)
-        self.v_scroll = ttk.Scrollbar(self.timetable_frame, orient="vertical", command=self.table_canvas.yview)
+        # Title above the table
+        self.table_title = ttk.Label(
+            self.timetable_frame,
+            text="University Timetable Scheduler",
+            font=("Arial", 16, "bold"),
+            foreground="#003087"
+        )
+
+        # The table is drawn straight onto one canvas; only visible cells get items
+        self.table_canvas = tk.Canvas(self.timetable_frame, bg=self.bg_color, highlightthickness=0)
+        self.h_scroll = ttk.Scrollbar(self.timetable_frame, orient="horizontal", command=self.scroll_x)
+        self.v_scroll = ttk.Scrollbar(self.timetable_frame, orient="vertical", command=self.scroll_y)
 
         # Configure the canvas
         self.table_canvas.configure(xscrollcommand=self.h_scroll.set, yscrollcommand=self.v_scroll.set)
+        self.table_canvas.bind("<Configure>", self.render_visible_cells)
+        self.table_canvas.bind("<MouseWheel>", lambda e: self.scroll_y("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.table_canvas.bind("<Button-4>", lambda e: self.scroll_y("scroll", -1, "units"))
+        self.table_canvas.bind("<Button-5>", lambda e: self.scroll_y("scroll", 1, "units"))
 
-        # Create a frame inside the canvas
-        self.table_inner_frame = ttk.Frame(self.table_canvas, padding=5)
-        self.table_inner_frame.bind(
-            "<Configure>",
-            lambda e: self.table_canvas.configure(
-                scrollregion=self.table_canvas.bbox("all")
-            )
-        )
-
-        # Add the inner frame to the canvas
-        self.table_canvas.create_window((0, 0), window=self.table_inner_frame, anchor="nw")
+        # Student and fitness info below the table
+        self.student_label = ttk.Label(self.timetable_frame, font=("Arial", 12), foreground="#003087")
+        self.fitness_label = ttk.Label(self.timetable_frame, font=("Arial", 10), foreground="#003087")
 
         # Grid layout for the canvas and scrollbars
-        self.table_canvas.grid(row=0, column=0, sticky="nsew")
-        self.v_scroll.grid(row=0, column=1, sticky="ns")
-        self.h_scroll.grid(row=1, column=0, sticky="ew")
+        self.table_title.grid(row=0, column=0, columnspan=2, pady=10)
+        self.table_canvas.grid(row=1, column=0, sticky="nsew")
+        self.v_scroll.grid(row=1, column=1, sticky="ns")
+        self.h_scroll.grid(row=2, column=0, sticky="ew")
+        self.student_label.grid(row=3, column=0, columnspan=2, pady=5)
+        self.fitness_label.grid(row=4, column=0, columnspan=2, pady=5)
 
         # Configure grid weights
-        self.timetable_frame.grid_rowconfigure(0, weight=1)
+        self.timetable_frame.grid_rowconfigure(1, weight=1)
         self.timetable_frame.grid_columnconfigure(0, weight=1)
 
+        # Table geometry and the cells currently drawn on the canvas
+        self.cell_width = 120
+        self.header_height = 40
+        self.session_height = 60
+        self.cell_sessions = {}
+        self.row_tops = [0]
+        self.drawn_cells = {}
+
         # Plot frame
         self.plot_frame = ttk.Frame(self.result_frame)
         self.figure = plt.Figure(figsize=(8, 5), dpi=100)  # Adjusted figure size
@@ -250,11 +294,15 @@ class UniversitySchedulerGUI:
 
         if courses:
             try:
-                with open("data.json", "w") as f:
+                with open(main.DATA_FILE, "w") as f:
                     json.dump(courses, f, indent=4)
             except Exception as e:
                 messagebox.showerror("File Error", f"Failed to save course data: {e}")
                 return
+            # Solve exactly what was entered rather than whatever main loaded earlier
+            self.problem = main.load_problem(courses)
+        else:
+            self.problem = None
 
         self.course_input_frame.pack_forget()
         self.student_frame.pack(pady=20)
@@ -274,18 +322,78 @@ class UniversitySchedulerGUI:
         self.result_frame.pack(fill="both", expand=True, pady=20)
         self.student_info = (student_name, student_id)
 
+        self.schedule_data = None
+        self.fitness_history = []
+        self.best_fitness = None
+        self.plot_line = None
+        self.progress.configure(value=0)
+        self.progress_label.configure(text="Starting...")
+        self.cancel_button.state(["!disabled"])
+
+        # Run the GA off the Tk main thread; progress comes back through the queue
+        self.cancel_event = threading.Event()
+        self.progress_queue = queue.Queue()
+        self.solver_thread = threading.Thread(target=self.run_solver, daemon=True)
+        self.solver_thread.start()
+        self.root.after(100, self.poll_solver)
+
+    def run_solver(self):
+        # Worker thread: never touches Tk widgets, only the queue
         try:
-            result = main.genetic_algorithm()
-            if isinstance(result, tuple):
-                self.schedule_data, self.fitness_history = result
-                self.best_fitness = self.fitness_history[-1] if self.fitness_history else 0
-            else:
-                self.schedule_data = result
-                self.fitness_history = None
-                self.best_fitness = None
-            self.show_timetable()
+            problem = self.problem or main.load_problem(main.DATA_FILE)
+            catalogue = problem.catalogue
+            best = None
+            for snapshot in main.genetic_algorithm_stream(generations=self.generations, catalogue=catalogue,
+                                                          cancel=self.cancel_event):
+                best = snapshot.pop("best")
+                self.progress_queue.put(("generation", snapshot))
+            schedule = main.decode_chromosome(catalogue, best)
+            # With enrollment data, an enrolled student only sees their own sessions
+            if os.path.exists(ENROLLMENT_FILE):
+                enrollment = load_enrollment(catalogue, ENROLLMENT_FILE)
+                if self.student_info[1] in enrollment.student_index:
+                    schedule = enrollment.timetable(self.student_info[1], best, schedule)
+            self.progress_queue.put(("done", schedule))
         except Exception as e:
-            messagebox.showerror("Scheduling Error", f"Failed to generate schedule: {e}")
+            self.progress_queue.put(("error", e))
+
+    def poll_solver(self):
+        finished = False
+        try:
+            while True:
+                kind, payload = self.progress_queue.get_nowait()
+                if kind == "generation":
+                    self.fitness_history.append(payload["best_fitness"])
+                    self.best_fitness = payload["best_fitness"]
+                    self.progress.configure(value=payload["generation"] + 1)
+                    self.progress_label.configure(
+                        text=f"Generation {payload['generation'] + 1}/{self.generations} - "
+                             f"Best Fitness: {payload['best_fitness']:.4f}"
+                    )
+                elif kind == "done":
+                    self.schedule_data = payload
+                    finished = True
+                else:
+                    messagebox.showerror("Scheduling Error", f"Failed to generate schedule: {payload}")
+                    finished = True
+        except queue.Empty:
+            pass
+
+        self.update_plot()
+        if not finished:
+            self.root.after(100, self.poll_solver)
+            return
+
+        self.cancel_button.state(["disabled"])
+        self.progress.configure(value=self.progress["maximum"])
+        if self.cancel_event.is_set():
+            self.progress_label.configure(text=f"Cancelled after {len(self.fitness_history)} generations")
+        if self.schedule_data:
+            self.show_timetable()
+
+    def cancel_schedule(self):
+        self.cancel_event.set()
+        self.progress_label.configure(text="Cancelling...")
 
     def show_timetable(self):
         if not self.schedule_data:
@@ -295,141 +403,112 @@ class UniversitySchedulerGUI:
         self.plot_frame.pack_forget()
         self.timetable_frame.pack(fill="both", expand=True, pady=10)
 
-        # Clear previous widgets
-        for widget in self.table_inner_frame.winfo_children():
-            widget.destroy()
-
-        # Title
-        ttk.Label(
-            self.table_inner_frame,
-            text="University Timetable Scheduler",
-            font=("Arial", 16, "bold"),
-            foreground="#003087"
-        ).grid(row=0, column=0, columnspan=len(self.time_slots) + 1, pady=10)
-
-        # Table headers
-        headers = ["Day"] + self.time_slots
-        for col, header in enumerate(headers):
-            cell = tk.Frame(
-                self.table_inner_frame,
-                bg=self.header_color,
-                relief=tk.RAISED,
-                borderwidth=1,
-                width=120,
-                height=40
-            )
-            cell.grid(row=1, column=col, sticky="nsew", padx=2, pady=2)
-            cell.grid_propagate(False)
-
-            tk.Label(
-                cell,
-                text=header,
-                bg=self.header_color,
-                fg="white",
-                font=("Arial", 10, "bold"),
-                wraplength=110
-            ).pack(expand=True, fill="both")
-
-        # Table content
-        for row, day in enumerate(self.days, 2):
-            # Day cell
-            day_cell = tk.Frame(
-                self.table_inner_frame,
-                bg=self.bg_color,
-                relief=tk.GROOVE,
-                borderwidth=1,
-                width=120,
-                height=60
+        # Index the schedule once by (day, slot); parallel sessions share a cell
+        self.cell_sessions = {}
+        for lec in self.schedule_data:
+            self.cell_sessions.setdefault((lec["day"], lec["slot"]), []).append(
+                (lec["course"], lec["type"], lec["instructor"], lec["room"])
             )
-            day_cell.grid(row=row, column=0, sticky="nsew", padx=2, pady=2)
-            day_cell.grid_propagate(False)
-
-            tk.Label(
-                day_cell,
-                text=day,
-                bg=self.bg_color,
-                fg=self.text_color,
-                font=("Arial", 10, "bold"),
-                wraplength=110
-            ).pack(expand=True, fill="both")
-
-            # Time slot cells
-            for col, slot in enumerate(self.time_slots, 1):
-                class_info = None
-                for lec in self.schedule_data:
-                    if lec["day"] == day and lec["slot"] == slot:
-                        class_info = lec
-                        break
-
-                cell_bg = self.bg_color
-                if class_info:
-                    cell_bg = self.lecture_color if class_info["type"] == "lecture" else self.lab_color
-
-                cell = tk.Frame(
-                    self.table_inner_frame,
-                    bg=cell_bg,
-                    relief=tk.GROOVE,
-                    borderwidth=1,
-                    width=120,
-                    height=60
-                )
-                cell.grid(row=row, column=col, sticky="nsew", padx=2, pady=2)
-                cell.grid_propagate(False)
-
-                if class_info:
-                    type_label = "Lec" if class_info["type"] == "lecture" else "Lab"
-                    tk.Label(
-                        cell,
-                        text=f"{class_info['course']} ({type_label})",
-                        bg=cell_bg,
-                        fg=self.text_color,
-                        font=("Arial", 9, "bold"),
-                        wraplength=110
-                    ).pack(pady=(2, 0))
-                    tk.Label(
-                        cell,
-                        text=class_info["instructor"],
-                        bg=cell_bg,
-                        fg="#555555",
-                        font=("Arial", 8),
-                        wraplength=110
-                    ).pack()
-                    tk.Label(
-                        cell,
-                        text=class_info["room"],
-                        bg=cell_bg,
-                        fg="#777777",
-                        font=("Arial", 8, "italic"),
-                        wraplength=110
-                    ).pack(pady=(0, 2))
+
+        # Row 0 is the header; each day row is as tall as its busiest slot
+        self.row_tops = [0, self.header_height]
+        for day in self.days:
+            depth = max([len(self.cell_sessions.get((day, slot), [])) for slot in self.time_slots] + [1])
+            self.row_tops.append(self.row_tops[-1] + depth * self.session_height)
+        width = self.cell_width * (len(self.time_slots) + 1)
+        self.table_canvas.configure(scrollregion=(0, 0, width, self.row_tops[-1]))
 
         # Student info
         if self.student_info[0] and self.student_info[1]:
-            ttk.Label(
-                self.table_inner_frame,
-                text=f"Schedule for {self.student_info[0]} (ID: {self.student_info[1]})",
-                font=("Arial", 12),
-                foreground="#003087"
-            ).grid(row=len(self.days) + 2, column=0, columnspan=len(self.time_slots) + 1, pady=5)
+            self.student_label.configure(text=f"Schedule for {self.student_info[0]} (ID: {self.student_info[1]})")
 
         # Fitness info
         if self.best_fitness is not None:
-            ttk.Label(
-                self.table_inner_frame,
-                text=f"Generation {len(self.fitness_history)} - Best Fitness: {self.best_fitness:.4f}",
-                font=("Arial", 10),
-                foreground="#003087"
-            ).grid(row=len(self.days) + 3, column=0, columnspan=len(self.time_slots) + 1, pady=5)
+            self.fitness_label.configure(
+                text=f"Generation {len(self.fitness_history)} - Best Fitness: {self.best_fitness:.4f}"
+            )
+
+        self.render_visible_cells()
+
+    def scroll_x(self, *args):
+        self.table_canvas.xview(*args)
+        self.render_visible_cells()
 
-        # Configure grid weights and minimum sizes
-        for col in range(len(headers)):
-            self.table_inner_frame.columnconfigure(col, weight=1, minsize=120)
+    def scroll_y(self, *args):
+        self.table_canvas.yview(*args)
+        self.render_visible_cells()
 
-        for row in range(len(self.days) + 3):
-            self.table_inner_frame.rowconfigure(row, weight=1, minsize=60)
+    def cell_content(self, row, col):
+        # What a cell shows; cells are redrawn only when this changes
+        if row == 0:
+            return ("header", "Day" if col == 0 else self.time_slots[col - 1])
+        day = self.days[row - 1]
+        if col == 0:
+            return ("day", day)
+        return ("sessions", tuple(self.cell_sessions.get((day, self.time_slots[col - 1]), ())))
 
-        # Update the canvas scroll region
-        self.table_canvas.configure(scrollregion=self.table_canvas.bbox("all"))
+    def render_visible_cells(self, event=None):
+        canvas = self.table_canvas
+        if len(self.row_tops) < 2:
+            return
+
+        # Visible rows and columns from the current scroll position
+        x0, y0 = canvas.canvasx(0), canvas.canvasy(0)
+        x1, y1 = x0 + canvas.winfo_width(), y0 + canvas.winfo_height()
+        n_cols = len(self.time_slots) + 1
+        first_col = max(0, int(x0 // self.cell_width))
+        last_col = min(n_cols - 1, int(x1 // self.cell_width))
+        first_row = max(0, bisect.bisect_right(self.row_tops, y0) - 1)
+        last_row = min(len(self.row_tops) - 2, bisect.bisect_right(self.row_tops, y1) - 1)
+        visible = {(r, c) for r in range(first_row, last_row + 1) for c in range(first_col, last_col + 1)}
+
+        for key in list(self.drawn_cells):
+            if key not in visible:
+                canvas.delete(f"cell_{key[0]}_{key[1]}")
+                del self.drawn_cells[key]
+
+        for row, col in visible:
+            content = self.cell_content(row, col)
+            drawn = (content, self.row_tops[row], self.row_tops[row + 1])
+            if self.drawn_cells.get((row, col)) == drawn:
+                continue
+            tag = f"cell_{row}_{col}"
+            canvas.delete(tag)
+            self.draw_cell(row, col, content, tag)
+            self.drawn_cells[(row, col)] = drawn
+
+    def draw_cell(self, row, col, content, tag):
+        canvas = self.table_canvas
+        left, top = col * self.cell_width + 2, self.row_tops[row] + 2
+        right, bottom = (col + 1) * self.cell_width - 2, self.row_tops[row + 1] - 2
+        centre = (left + right) / 2
+        kind, value = content
+
+        if kind == "header":
+            canvas.create_rectangle(left, top, right, bottom, fill=self.header_color, outline="#333333", tags=tag)
+            canvas.create_text(centre, (top + bottom) / 2, text=value, fill="white",
+                               font=("Arial", 10, "bold"), width=110, tags=tag)
+            return
+        if kind == "day" or not value:
+            canvas.create_rectangle(left, top, right, bottom, fill=self.bg_color, outline="#999999", tags=tag)
+            if kind == "day":
+                canvas.create_text(centre, (top + bottom) / 2, text=value, fill=self.text_color,
+                                   font=("Arial", 10, "bold"), width=110, tags=tag)
+            return
+
+        # One block per session in the cell, stacked top to bottom
+        for i, (course, lec_type, instructor, room) in enumerate(value):
+            block_top = top + i * self.session_height
+            block_bottom = min(block_top + self.session_height - 2, bottom)
+            cell_bg = self.lecture_color if lec_type == "lecture" else self.lab_color
+            type_label = "Lec" if lec_type == "lecture" else "Lab"
+            canvas.create_rectangle(left, block_top, right, block_bottom, fill=cell_bg, outline="#999999", tags=tag)
+            canvas.create_text(centre, block_top + 12, text=f"{course} ({type_label})", fill=self.text_color,
+                               font=("Arial", 9, "bold"), width=110, tags=tag)
+            canvas.create_text(centre, block_top + 29, text=instructor, fill="#555555",
+                               font=("Arial", 8), width=110, tags=tag)
+            canvas.create_text(centre, block_top + 45, text=room, fill="#777777",
+                               font=("Arial", 8, "italic"), width=110, tags=tag)
 
     def show_plot(self):
         if not self.fitness_history:
@@ -441,7 +520,7 @@ class UniversitySchedulerGUI:
 
         self.figure.clear()
         ax = self.figure.add_subplot(111)
-        ax.plot(self.fitness_history, marker="o", linestyle="-", color=self.accent_color)
+        self.plot_line, = ax.plot(self.fitness_history, marker="o", linestyle="-", color=self.accent_color)
         ax.set_title("Fitness Score Over Generations", fontsize=14, color="#003087")
         ax.set_xlabel("Generation", fontsize=12, color="#003087")
         ax.set_ylabel("Best Fitness Score", fontsize=12, color="#003087")
@@ -450,6 +529,18 @@ class UniversitySchedulerGUI:
         self.figure.set_facecolor(self.bg_color)
         self.canvas.draw()
 
+    def update_plot(self):
+        # Extend the existing line with new generations instead of redrawing the figure
+        if self.plot_line is None or not self.plot_frame.winfo_ismapped():
+            return
+        if len(self.plot_line.get_xdata()) == len(self.fitness_history):
+            return
+        self.plot_line.set_data(range(len(self.fitness_history)), self.fitness_history)
+        ax = self.plot_line.axes
+        ax.relim()
+        ax.autoscale_view()
+        self.canvas.draw_idle()
+
 
 if __name__ == "__main__":
     root = tk.Tk()
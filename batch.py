@@ -0,0 +1,113 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import main
+from encoding import decode_chromosome
+
+
+# ------------------------- Job Input -------------------------
+def read_jobs(source):
+    # Yields (job_id, document): the path of every *.json file in a directory,
+    # or the text of every line of a JSONL file. Documents are parsed by the
+    # worker, so one malformed document only fails its own job.
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".json"):
+                yield os.path.splitext(name)[0], os.path.join(source, name)
+        return
+    with open(source, "r") as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                yield f"line-{number}", io.StringIO(line)
+
+
+# ------------------------- Solve One Job -------------------------
+# Runs in a worker process. time_limit is passed to the GA as its wall-clock
+# budget, so a job that runs out of time still reports its best schedule.
+def solve_job(job_id, document, options):
+    started = time.perf_counter()
+    try:
+        problem = main.load_problem(document)
+        loaded = time.perf_counter()
+        last = None
+        for snapshot in main.genetic_algorithm_stream(problem=problem, **options):
+            last = snapshot
+        solved = time.perf_counter()
+        return {
+            "job": job_id,
+            "schedule": decode_chromosome(problem.catalogue, last["best"]),
+            "fitness": last["best_fitness"],
+            "penalty": {
+                "room_clashes": last["room_clashes"],
+                "instructor_clashes": last["instructor_clashes"],
+                "total": 1 + last["room_clashes"] + last["instructor_clashes"]
+            },
+            "generations": last["generation"] + 1,
+            "stop": last["stop"],
+            "timings": {
+                "load": loaded - started,
+                "solve": solved - loaded,
+                "total": solved - started,
+                "evaluations_per_second": last["evaluations_per_second"]
+            }
+        }
+    except Exception as e:
+        return {"job": job_id, "error": f"{type(e).__name__}: {e}",
+                "timings": {"total": time.perf_counter() - started}}
+
+
+# ------------------------- Batch Runner -------------------------
+def run_batch(jobs, out, workers=None, time_limit=None, seed=None, **options):
+    # Solves jobs across a process pool and writes one JSON line per finished
+    # job, in completion order. At most 2 * workers jobs are in flight, so
+    # large batches are read and written as a stream.
+    workers = workers or os.cpu_count() or 1
+    options = dict(options, time_budget=time_limit)
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, (job_id, document) in enumerate(jobs):
+            job_options = dict(options, seed=None if seed is None else seed + index)
+            pending.add(executor.submit(solve_job, job_id, document, job_options))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _write_results(done, out)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            _write_results(done, out)
+
+
+def _write_results(futures, out):
+    for future in futures:
+        out.write(json.dumps(future.result()) + "\n")
+    out.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solve many timetables in parallel and stream results as JSONL.")
+    parser.add_argument("source", help="directory of *.json files or a JSONL file of course requirements")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-t", "--time-limit", type=float, default=None, help="seconds per job")
+    parser.add_argument("--pop-size", type=int, default=50)
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None, help="base seed; job i uses seed + i")
+    parser.add_argument("--seed-fraction", type=float, default=0.0)
+    parser.add_argument("--local-search", choices=["tabu", "anneal"], default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        run_batch(read_jobs(args.source), out, workers=args.workers, time_limit=args.time_limit, seed=args.seed,
+                  pop_size=args.pop_size, generations=args.generations, seed_fraction=args.seed_fraction,
+                  local_search=args.local_search)
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -0,0 +1,173 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+import main
+from encoding import random_chromosome
+from fitness import population_fitness
+
+SCALES = {
+    "small": {"n_courses": 40, "n_instructors": 15},
+    "medium": {"n_courses": 300, "n_instructors": 90},
+    "large": {"n_courses": 1500, "n_instructors": 400}
+}
+
+
+# ------------------------- Synthetic Instances -------------------------
+def synthetic_requirements(n_courses, n_instructors, lab_share=0.5, lecture_hours=(1, 3), lab_hours=(1, 2), seed=0):
+    # Courses in the data.json schema; lab_share of them also have a lab
+    rng = random.Random(seed)
+    requirements = {}
+    for i in range(n_courses):
+        course = {"lectures": {"hours": rng.randint(*lecture_hours),
+                               "lecturer": f"instructor{rng.randrange(n_instructors)}"}}
+        if rng.random() < lab_share:
+            course["labs"] = {"hours": rng.randint(*lab_hours), "ta": f"instructor{rng.randrange(n_instructors)}"}
+        requirements[f"course{i}"] = course
+    return requirements
+
+
+def synthetic_problem(n_courses, n_instructors, n_rooms=None, contention=0.6, seed=0, **course_options):
+    # Without n_rooms, rooms are sized so sessions fill `contention` of each
+    # room type's (day, slot, room) cells
+    requirements = synthetic_requirements(n_courses, n_instructors, seed=seed, **course_options)
+    n_times = len(main.days) * len(main.time_slots)
+    lectures = sum(c["lectures"]["hours"] for c in requirements.values())
+    labs = sum(c["labs"]["hours"] for c in requirements.values() if "labs" in c)
+    if n_rooms is None:
+        n_lecture = max(1, math.ceil(lectures / (n_times * contention)))
+        n_lab = max(1, math.ceil(labs / (n_times * contention)))
+    else:
+        n_lab = max(1, round(n_rooms * labs / max(lectures + labs, 1)))
+        n_lecture = max(1, n_rooms - n_lab)
+    return main.load_problem(requirements,
+                             lecture_rooms=[f"R{i}" for i in range(n_lecture)],
+                             lab_rooms=[f"Lab{i}" for i in range(n_lab)])
+
+
+# ------------------------- Timing -------------------------
+def time_call(fn, min_time=0.2, max_calls=10000):
+    # Mean seconds per call over enough calls to run for about min_time
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or calls >= max_calls:
+            return elapsed / calls
+
+
+def bench_scale(name, problem, pop_size=50, generations=100, seed=0):
+    catalogue = problem.catalogue
+    schedule = main.create_random_schedule(problem)
+    other = main.create_random_schedule(problem)
+    rng = np.random.default_rng(seed)
+    population = np.stack([random_chromosome(catalogue, rng) for _ in range(pop_size)])
+
+    operators = {
+        "create_random_schedule": time_call(lambda: main.create_random_schedule(problem)),
+        "calculate_fitness": time_call(lambda: main.calculate_fitness(schedule)),
+        "crossover": time_call(lambda: main.crossover(schedule, other)),
+        "mutate": time_call(lambda: main.mutate([dict(g) for g in schedule], problem=problem)),
+        "random_chromosome": time_call(lambda: random_chromosome(catalogue, rng)),
+        "population_fitness": time_call(lambda: population_fitness(catalogue, population))
+    }
+
+    start = time.perf_counter()
+    last = None
+    for snapshot in main.genetic_algorithm_stream(pop_size, generations, seed=seed, problem=problem):
+        last = snapshot
+    elapsed = time.perf_counter() - start
+
+    # Peak memory from a second, traced run so tracing doesn't skew the timings
+    tracemalloc.start()
+    for _ in main.genetic_algorithm_stream(pop_size, generations, seed=seed, problem=problem):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "scale": name,
+        "courses": len(problem.course_requirements),
+        "sessions": catalogue.n_sessions,
+        "instructors": catalogue.n_instructors,
+        "rooms": catalogue.n_rooms,
+        "seconds_per_call": operators,
+        "evaluations_per_second": {
+            "calculate_fitness": 1 / operators["calculate_fitness"],
+            "population_fitness": pop_size / operators["population_fitness"],
+            "genetic_algorithm": last["evaluations"] / elapsed
+        },
+        "genetic_algorithm": {
+            "seconds": elapsed,
+            "generations": last["generation"] + 1,
+            "reached_target": last["stop"] == "solved",
+            "best_fitness": last["best_fitness"],
+            "clashes": last["room_clashes"] + last["instructor_clashes"]
+        },
+        "peak_memory_bytes": peak
+    }
+
+
+# ------------------------- Report -------------------------
+def run_benchmarks(scales, pop_size=50, generations=100, seed=0):
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pop_size": pop_size,
+            "generations": generations,
+            "seed": seed
+        },
+        "results": [bench_scale(name, synthetic_problem(seed=seed, **SCALES[name]), pop_size, generations, seed)
+                    for name in scales]
+    }
+
+
+def compare(report, baseline):
+    # Ratio of new to old seconds per call and GA time, per scale (< 1 is faster)
+    old = {r["scale"]: r for r in baseline["results"]}
+    lines = []
+    for result in report["results"]:
+        before = old.get(result["scale"])
+        if before is None:
+            continue
+        for op, seconds in result["seconds_per_call"].items():
+            if op in before["seconds_per_call"]:
+                lines.append(f"{result['scale']:<8} {op:<24} {seconds / before['seconds_per_call'][op]:6.2f}x")
+        ratio = result["genetic_algorithm"]["seconds"] / before["genetic_algorithm"]["seconds"]
+        lines.append(f"{result['scale']:<8} {'genetic_algorithm':<24} {ratio:6.2f}x")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the timetable solver on synthetic instances.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--pop-size", type=int, default=50)
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmarks(args.scales, args.pop_size, args.generations, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
@@ -0,0 +1,57 @@
+import json
+import os
+import numpy as np
+
+from encoding import match_schedule, random_chromosome
+
+
+# ------------------------- Checkpoint Files -------------------------
+# A checkpoint is a compressed .npz holding the population (in the
+# catalogue's integer dtype), the generator's bit-generator state and the
+# loop counters. It is written to a temporary file and renamed over the old
+# one, so a run killed mid-write leaves the previous checkpoint intact.
+def save_checkpoint(path, population, rng, generation, fitness_history, best_seen=-1.0, best_gen=0,
+                    evaluations=0):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(
+            f,
+            population=population,
+            rng_state=np.array(json.dumps(rng.bit_generator.state)),
+            generation=np.int64(generation),
+            fitness_history=np.asarray(fitness_history, dtype=np.float64),
+            best_seen=np.float64(best_seen),
+            best_gen=np.int64(best_gen),
+            evaluations=np.int64(evaluations)
+        )
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with np.load(path) as data:
+        state = json.loads(str(data["rng_state"]))
+        rng = np.random.Generator(getattr(np.random, state["bit_generator"])())
+        rng.bit_generator.state = state
+        return {
+            "population": data["population"].copy(),
+            "rng": rng,
+            "generation": int(data["generation"]),
+            "fitness_history": data["fitness_history"].tolist(),
+            "best_seen": float(data["best_seen"]),
+            "best_gen": int(data["best_gen"]),
+            "evaluations": int(data["evaluations"])
+        }
+
+
+# ------------------------- Warm Start -------------------------
+def chromosome_from_schedule(catalogue, schedule, rng):
+    # Carries an earlier schedule (e.g. last semester's best) over to this
+    # catalogue: sessions whose course, type, day, slot and room still exist
+    # keep their cell, everything else is placed at random
+    chromosome = random_chromosome(catalogue, rng)
+    for _, session, cell in match_schedule(catalogue, schedule, strict=False):
+        if cell >= 0:
+            chromosome[session] = cell
+    return chromosome
@@ -0,0 +1,160 @@
+import numpy as np
+
+from encoding import SESSION_TYPES
+from fitness import duplicate_counts
+
+
+# ------------------------- Constraint Base -------------------------
+# A constraint is compiled once against a catalogue into lookup tables or
+# masks; evaluate() then scores a whole (pop_size, n_sessions) population
+# with table lookups and returns one violation count per individual.
+# Room and instructor clashes are always scored by the GA itself; these are
+# the extra terms added on top of them.
+class Constraint:
+    name = "constraint"
+
+    def __init__(self, weight=1.0, hard=True):
+        self.weight = weight
+        self.hard = hard
+
+    def compile(self, catalogue):
+        pass
+
+    def evaluate(self, cells, times, rooms):
+        raise NotImplementedError
+
+
+class RoomType(Constraint):
+    # Labs only in lab rooms, lectures only in lecture rooms
+    name = "room_type"
+
+    def compile(self, catalogue):
+        allowed = np.zeros((len(SESSION_TYPES), catalogue.n_rooms), dtype=bool)
+        for t, rooms in enumerate(catalogue.type_rooms):
+            allowed[t, rooms] = True
+        self.wrong_room = ~allowed[catalogue.session_type]
+
+    def evaluate(self, cells, times, rooms):
+        return self.wrong_room[np.arange(rooms.shape[1]), rooms].sum(axis=1)
+
+
+class InstructorAvailability(Constraint):
+    # unavailable: {instructor: [(day, slot), ...]} times the instructor can't teach
+    name = "instructor_availability"
+
+    def __init__(self, unavailable, weight=1.0, hard=True):
+        super().__init__(weight, hard)
+        self.unavailable = unavailable
+
+    def compile(self, catalogue):
+        blocked = np.zeros((catalogue.n_instructors, catalogue.n_times), dtype=bool)
+        index = {name: i for i, name in enumerate(catalogue.instructors)}
+        for name, times in self.unavailable.items():
+            if name not in index:
+                continue
+            for day, slot in times:
+                blocked[index[name], catalogue.days.index(day) * catalogue.n_slots + catalogue.time_slots.index(slot)] = True
+        self.blocked = blocked[catalogue.session_instructor]
+
+    def evaluate(self, cells, times, rooms):
+        return self.blocked[np.arange(times.shape[1]), times].sum(axis=1)
+
+
+class RoomCapacity(Constraint):
+    # capacities: {room: seats}, enrolment: {course: students}; missing entries never violate
+    name = "room_capacity"
+
+    def __init__(self, capacities, enrolment, weight=1.0, hard=True):
+        super().__init__(weight, hard)
+        self.capacities = capacities
+        self.enrolment = enrolment
+
+    def compile(self, catalogue):
+        seats = np.array([self.capacities.get(r, np.inf) for r in catalogue.rooms], dtype=np.float64)
+        students = np.array([self.enrolment.get(c, 0) for c in catalogue.courses], dtype=np.float64)
+        self.too_small = students[catalogue.session_course][:, None] > seats[None, :]
+
+    def evaluate(self, cells, times, rooms):
+        return self.too_small[np.arange(rooms.shape[1]), rooms].sum(axis=1)
+
+
+class StudentGroupClash(Constraint):
+    # groups: {group: [course, ...]} courses taken together by one cohort,
+    # so no two of their sessions may share a time
+    name = "student_group_clash"
+
+    def __init__(self, groups, weight=1.0, hard=True):
+        super().__init__(weight, hard)
+        self.groups = groups
+
+    def compile(self, catalogue):
+        course_index = {c: i for i, c in enumerate(catalogue.courses)}
+        sessions, groups = [], []
+        for g, courses in enumerate(self.groups.values()):
+            for course in courses:
+                if course in course_index:
+                    members = np.flatnonzero(catalogue.session_course == course_index[course])
+                    sessions.extend(members)
+                    groups.extend([g] * len(members))
+        self.member_sessions = np.array(sessions, dtype=np.int64)
+        self.member_groups = np.array(groups, dtype=np.int64)
+        self.n_groups = len(self.groups)
+        self.n_times = catalogue.n_times
+
+    def evaluate(self, cells, times, rooms):
+        keys = times[:, self.member_sessions] * self.n_groups + self.member_groups
+        return duplicate_counts(keys, self.n_times * self.n_groups)
+
+
+class InstructorGaps(Constraint):
+    # Idle slots between an instructor's first and last session of a day
+    name = "instructor_gaps"
+
+    def __init__(self, weight=0.1, hard=False):
+        super().__init__(weight, hard)
+
+    def compile(self, catalogue):
+        self.session_instructor = catalogue.session_instructor
+        self.n_instructors = catalogue.n_instructors
+        self.n_days = len(catalogue.days)
+        self.n_slots = catalogue.n_slots
+
+    def evaluate(self, cells, times, rooms):
+        pop = len(times)
+        width = self.n_instructors * self.n_days * self.n_slots
+        keys = (np.arange(pop)[:, None] * width
+                + self.session_instructor * (self.n_days * self.n_slots) + times).ravel()
+        busy = np.bincount(keys, minlength=pop * width).reshape(pop, -1, self.n_slots) > 0
+        any_busy = busy.any(axis=2)
+        first = busy.argmax(axis=2)
+        last = self.n_slots - 1 - busy[:, :, ::-1].argmax(axis=2)
+        span = np.where(any_busy, last - first + 1, 0)
+        return (span - busy.sum(axis=2)).sum(axis=1)
+
+
+# ------------------------- Engine -------------------------
+class ConstraintEngine:
+    def __init__(self, catalogue, constraints):
+        self.catalogue = catalogue
+        self.constraints = list(constraints)
+        for constraint in self.constraints:
+            constraint.compile(catalogue)
+        self.weights = np.array([c.weight for c in self.constraints], dtype=np.float64)
+        self.hard = np.array([c.hard for c in self.constraints], dtype=bool)
+        self.names = [c.name for c in self.constraints]
+
+    def violations(self, population):
+        # (pop_size, n_constraints) matrix of raw violation counts
+        cells = np.atleast_2d(np.asarray(population)).astype(np.int64)
+        times, rooms = cells // self.catalogue.n_rooms, cells % self.catalogue.n_rooms
+        if not self.constraints:
+            return np.zeros((len(cells), 0))
+        return np.stack([c.evaluate(cells, times, rooms) for c in self.constraints], axis=1)
+
+    def penalties(self, violations):
+        # Weighted penalty per individual from a violations() matrix, to add
+        # to the clash count
+        return violations @ self.weights
+
+    def breakdown(self, row):
+        return {name: float(v) for name, v in zip(self.names, row)}
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import sqlite3
+import time
+from email.message import Message
+
+COMMIT_EVERY = 64
+
+
+# ------------------------- Crawl Cache -------------------------
+# One SQLite file holding two tables:
+#   responses  last 200 response per URL: validators (ETag, Last-Modified),
+#              a SHA-256 of the body and the body itself; least recently
+#              used entries are evicted once bodies exceed max_bytes
+#   listings   a fingerprint of each detail page's listing entry (name,
+#              price, stock), for incremental crawls
+# It is only used from the event loop's thread.
+class CrawlCache:
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, final_url TEXT, status INTEGER, content_type TEXT,
+                etag TEXT, last_modified TEXT, sha256 TEXT, size INTEGER, accessed REAL, body BLOB);
+            CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+            CREATE TABLE IF NOT EXISTS listings (url TEXT PRIMARY KEY, fingerprint TEXT);
+        """)
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._pending = 0
+
+    # --- responses ---
+    def lookup(self, url):
+        row = self._db.execute(
+            "SELECT final_url, status, content_type, etag, last_modified, sha256, body FROM responses WHERE url = ?",
+            (url,)).fetchone()
+        if row is None:
+            return None
+        keys = ("final_url", "status", "content_type", "etag", "last_modified", "sha256", "body")
+        return dict(zip(keys, row))
+
+    def headers(self, entry):
+        # Conditional request headers for a cached entry
+        conditional = {}
+        if entry["etag"]:
+            conditional["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            conditional["If-Modified-Since"] = entry["last_modified"]
+        return conditional
+
+    def touch(self, url):
+        self._db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+        self._changed()
+
+    def store(self, url, final_url, status, headers, body):
+        # Returns True if the body differs from the cached one (or is new)
+        digest = hashlib.sha256(body).hexdigest()
+        old = self._db.execute("SELECT sha256, size FROM responses WHERE url = ?", (url,)).fetchone()
+        if len(body) > self.max_bytes:
+            return old is None or old[0] != digest
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, final_url, status, headers.get("Content-Type"), headers.get("ETag"),
+             headers.get("Last-Modified"), digest, len(body), time.time(), body))
+        self.size += len(body) - (old[1] if old else 0)
+        self._evict()
+        self._changed()
+        return old is None or old[0] != digest
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            url, size = self._db.execute(
+                "SELECT url, size FROM responses ORDER BY accessed LIMIT 1").fetchone()
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.size -= size
+
+    @staticmethod
+    def message(content_type):
+        headers = Message()
+        if content_type:
+            headers["Content-Type"] = content_type
+        return headers
+
+    # --- listings ---
+    @staticmethod
+    def fingerprint(*fields):
+        return hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def listing_unchanged(self, url, fingerprint):
+        row = self._db.execute("SELECT fingerprint FROM listings WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] == fingerprint
+
+    def remember_listing(self, url, fingerprint):
+        self._db.execute("INSERT OR REPLACE INTO listings VALUES (?, ?)", (url, fingerprint))
+        self._changed()
+
+    # --- persistence ---
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self._db.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
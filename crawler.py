@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import csv
+import http.client
+import json
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from crawl_cache import CrawlCache
+
+BASE_URL = "https://books.toscrape.com/catalogue/"
+FIELDS = ("Page Number", "Book Name", "Price", "Stock Availability", "Description")
+USER_AGENT = "timetable-books-crawler/1.0"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# ------------------------- HTML Parsing -------------------------
+# Stdlib replacements for the spider's CSS selectors.
+class ListingParser(HTMLParser):
+    # One dict per article.product_pod: the h3 link's title and href, the
+    # first text of p.price_color and all text of p.instock.availability
+    def __init__(self):
+        super().__init__()
+        self.books = []
+        self._book = None
+        self._in_h3 = False
+        self._field = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "article" and "product_pod" in classes:
+            self._book = {"name": None, "href": None, "price": None, "stock": ""}
+        elif self._book is None:
+            return
+        elif tag == "h3":
+            self._in_h3 = True
+        elif tag == "a" and self._in_h3 and self._book["href"] is None:
+            self._book["name"], self._book["href"] = attrs.get("title"), attrs.get("href")
+        elif tag == "p" and "price_color" in classes:
+            self._field = "price"
+        elif tag == "p" and "instock" in classes and "availability" in classes:
+            self._field = "stock"
+
+    def handle_endtag(self, tag):
+        if tag == "h3":
+            self._in_h3 = False
+        elif tag == "p":
+            self._field = None
+        elif tag == "article" and self._book is not None:
+            self._book["stock"] = self._book["stock"].strip()
+            self.books.append(self._book)
+            self._book = None
+
+    def handle_data(self, data):
+        if self._field == "price" and self._book["price"] is None:
+            self._book["price"] = data
+        elif self._field == "stock":
+            self._book["stock"] += data
+
+
+class DescriptionParser(HTMLParser):
+    # content of <meta name="description">
+    def __init__(self):
+        super().__init__()
+        self.description = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta" and attrs.get("name") == "description" and self.description is None:
+            self.description = attrs.get("content")
+
+
+def parse_listing(html):
+    parser = ListingParser()
+    parser.feed(html)
+    parser.close()
+    return parser.books
+
+
+def parse_description(html):
+    parser = DescriptionParser()
+    parser.feed(html)
+    parser.close()
+    return parser.description
+
+
+# ------------------------- Fetching -------------------------
+class Response:
+    # changed: the body differs from the cached copy, or there is none
+    def __init__(self, url, status, headers, body, changed=True):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.changed = changed
+
+    @property
+    def text(self):
+        charset = self.headers.get_content_charset() if hasattr(self.headers, "get_content_charset") else None
+        return self.body.decode(charset or "utf-8", errors="replace")
+
+
+class FetchError(Exception):
+    pass
+
+
+class HostLimiter:
+    # At most `rate` requests per second to each host. Start times are
+    # reserved up front, so concurrent waiters queue up instead of bursting.
+    def __init__(self, rate=None):
+        self.interval = 1 / rate if rate else 0.0
+        self._next = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next.get(host, now))
+        self._next[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class Fetcher:
+    # Bounded-concurrency GETs with per-host rate limiting and retries with
+    # exponential backoff and jitter. urllib runs in worker threads, so no
+    # third-party HTTP client is needed. With a CrawlCache, requests for
+    # cached URLs are conditional and a 304 is answered from the cache.
+    def __init__(self, concurrency=16, rate=None, retries=3, backoff=0.5, max_backoff=30.0, timeout=30.0,
+                 cache=None):
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = HostLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.requests = 0
+        self.retried = 0
+        self.cache_hits = 0
+        self.bytes = 0
+
+    def _get(self, url, headers):
+        request = urllib.request.Request(url, headers=dict({"User-Agent": USER_AGENT}, **headers))
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return Response(response.geturl(), response.status, response.headers, response.read())
+        except urllib.error.HTTPError as e:
+            return Response(url, e.code, e.headers, e.read())
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None and response.headers else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * (0.5 + random.random())
+
+    async def get(self, url, headers=None):
+        # Returns the Response for any status below 400 (or 404/410 and other
+        # non-retryable errors, for the caller to judge); raises FetchError
+        # once retries are exhausted
+        host = urlsplit(url).netloc
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        headers = dict(headers or {}, **(self.cache.headers(cached) if cached else {}))
+        for attempt in range(self.retries + 1):
+            response, error = None, None
+            async with self.semaphore:
+                await self.limiter.wait(host)
+                self.requests += 1
+                try:
+                    response = await asyncio.to_thread(self._get, url, headers)
+                except (urllib.error.URLError, OSError, http.client.HTTPException) as e:
+                    error = e
+            if error is None and response.status not in RETRY_STATUSES:
+                return self._settle(url, response, cached)
+            if attempt == self.retries:
+                raise FetchError(f"{url}: {error or f'HTTP {response.status}'}")
+            self.retried += 1
+            await asyncio.sleep(self._delay(attempt, response))
+
+    def _settle(self, url, response, cached):
+        if response.status == 304 and cached is not None:
+            self.cache_hits += 1
+            self.cache.touch(url)
+            return Response(cached["final_url"], cached["status"], CrawlCache.message(cached["content_type"]),
+                            cached["body"], changed=False)
+        self.bytes += len(response.body)
+        if self.cache is not None and response.status == 200:
+            response.changed = self.cache.store(url, response.url, response.status, response.headers, response.body)
+        return response
+
+
+# ------------------------- Item Sinks -------------------------
+class ItemWriter:
+    # JSONL or CSV, one item at a time; flushed every `flush_every` items
+    def __init__(self, out, fmt="jsonl", flush_every=50):
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown format {fmt!r}, expected 'jsonl' or 'csv'")
+        self.out = out
+        self.fmt = fmt
+        self.flush_every = flush_every
+        self.count = 0
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, item):
+        if self.fmt == "csv":
+            self._csv.writerow(item)
+        else:
+            self.out.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.out.flush()
+
+    def close(self):
+        self.out.flush()
+
+
+# ------------------------- Book Crawl -------------------------
+def page_urls(pages=50, base_url=BASE_URL):
+    return [urljoin(base_url, f"page-{i}.html") for i in range(1, pages + 1)]
+
+
+async def crawl_books(start_urls, writer, fetcher=None, workers=16, queue_size=64, incremental=False):
+    # Listing pages -> book pages -> writer, connected by bounded queues: when
+    # the writer falls behind, book workers block on `items`, listing workers
+    # block on `books`, and no more pages are fetched until there is room.
+    # A page that still fails after its retries is counted and skipped; any
+    # other error in a stage cancels the whole crawl and is re-raised.
+    # incremental (needs a fetcher with a cache) skips books whose listing
+    # entry matches the last written one, so only new or changed books are
+    # fetched and written. unchanged_pages counts listing pages whose body
+    # matched the cached copy.
+    fetcher = fetcher or Fetcher()
+    cache = fetcher.cache
+    if incremental and cache is None:
+        raise ValueError("Incremental crawls need a Fetcher with a CrawlCache")
+    pages, books, items = asyncio.Queue(queue_size), asyncio.Queue(queue_size), asyncio.Queue(queue_size)
+    stats = {"pages": 0, "unchanged_pages": 0, "books": 0, "items": 0, "unchanged": 0, "failed": []}
+    started = time.perf_counter()
+    n_listers = max(1, workers // 4)
+    running = {"listers": n_listers, "fetchers": workers}
+
+    # Each stage passes one None per downstream worker on once its last
+    # worker finishes, so the pipeline drains in order
+    async def feed():
+        for url in start_urls:
+            await pages.put(url)
+        for _ in range(n_listers):
+            await pages.put(None)
+
+    async def list_pages():
+        while (url := await pages.get()) is not None:
+            try:
+                response = await fetcher.get(url)
+            except FetchError as e:
+                stats["failed"].append(str(e))
+                continue
+            if response.status >= 400:
+                stats["failed"].append(f"{url}: HTTP {response.status}")
+                continue
+            stats["pages"] += 1
+            stats["unchanged_pages"] += not response.changed
+            page_number = response.url.split("-")[-1].replace(".html", "")
+            for book in parse_listing(response.text):
+                url = urljoin(response.url, book["href"] or "")
+                fingerprint = None
+                if cache is not None:
+                    fingerprint = CrawlCache.fingerprint(book["name"], book["price"], book["stock"])
+                    if incremental and cache.listing_unchanged(url, fingerprint):
+                        stats["unchanged"] += 1
+                        continue
+                await books.put((url, fingerprint, {
+                    "Page Number": page_number,
+                    "Book Name": book["name"],
+                    "Price": book["price"],
+                    "Stock Availability": book["stock"]
+                }))
+        running["listers"] -= 1
+        if running["listers"] == 0:
+            for _ in range(workers):
+                await books.put(None)
+
+    async def fetch_books():
+        while (job := await books.get()) is not None:
+            url, fingerprint, item = job
+            try:
+                response = await fetcher.get(url)
+            except FetchError as e:
+                stats["failed"].append(str(e))
+                continue
+            if response.status >= 400:
+                stats["failed"].append(f"{url}: HTTP {response.status}")
+                continue
+            stats["books"] += 1
+            await items.put((url, fingerprint, dict(item, Description=parse_description(response.text))))
+        running["fetchers"] -= 1
+        if running["fetchers"] == 0:
+            await items.put(None)
+
+    async def drain():
+        # Listing fingerprints are only recorded once their item is written
+        while (job := await items.get()) is not None:
+            url, fingerprint, item = job
+            writer.write(item)
+            stats["items"] += 1
+            if fingerprint is not None:
+                cache.remember_listing(url, fingerprint)
+
+    # One task group supervises every stage: if any of them raises (say the
+    # writer hits a broken pipe), the others are cancelled instead of waiting
+    # forever on a queue nobody drains
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(drain())
+            for _ in range(n_listers):
+                group.create_task(list_pages())
+            for _ in range(workers):
+                group.create_task(fetch_books())
+            group.create_task(feed())
+    except BaseExceptionGroup as failed:
+        raise failed.exceptions[0]
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.commit()
+
+    stats.update(requests=fetcher.requests, retried=fetcher.retried, cache_hits=fetcher.cache_hits,
+                 bytes=fetcher.bytes, seconds=time.perf_counter() - started)
+    return stats
+
+
+async def crawl(out, fmt="jsonl", pages=50, base_url=BASE_URL, concurrency=16, rate=None, retries=3,
+                workers=None, queue_size=64, cache_path=None, cache_bytes=64 * 1024 * 1024, incremental=False):
+    # Crawls `pages` listing pages into `out`. cache_path keeps a CrawlCache
+    # between runs; incremental then writes only new or changed books.
+    # Where an event loop is already running, e.g. a Jupyter or Colab cell,
+    # use `stats = await crawl(out, ...)`.
+    cache = CrawlCache(cache_path, cache_bytes) if cache_path else None
+    try:
+        fetcher = Fetcher(concurrency, rate, retries, cache=cache)
+        return await crawl_books(page_urls(pages, base_url), ItemWriter(out, fmt), fetcher,
+                                 workers or concurrency, queue_size, incremental)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_crawl(*args, **options):
+    # Synchronous form of crawl() for scripts and the command line. asyncio.run()
+    # can't start inside a running event loop, so notebooks get pointed at crawl()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("run_crawl() can't be used while an event loop is running (e.g. in Jupyter "
+                           "or Colab); use `await crawl(...)` with the same arguments instead")
+    return asyncio.run(crawl(*args, **options))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl books.toscrape.com into JSONL or CSV.")
+    parser.add_argument("-o", "--output", help="output file; .csv writes CSV, anything else JSONL "
+                                               "(default: JSONL on stdout)")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="max requests per second per host")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--cache", help="SQLite file for the response cache, reused across runs")
+    parser.add_argument("--cache-size", type=float, default=64, help="cache size limit in MB")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch and write books whose listing entry changed (needs --cache)")
+    args = parser.parse_args(argv)
+    if args.incremental and not args.cache:
+        parser.error("--incremental needs --cache")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    fmt = "csv" if args.output and args.output.endswith(".csv") else "jsonl"
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        stats = run_crawl(out, fmt, args.pages, args.base_url, args.concurrency, args.rate, args.retries,
+                          cache_path=args.cache, cache_bytes=int(args.cache_size * 1024 * 1024),
+                          incremental=args.incremental)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps({k: v for k, v in stats.items() if k != "failed"} | {"failed": len(stats["failed"])}),
+          file=sys.stderr)
@@ -0,0 +1,132 @@
+import numpy as np
+
+LECTURE, LAB = 0, 1
+SESSION_TYPES = ["lecture", "lab"]
+
+
+# ------------------------- Catalogue -------------------------
+# Integer-indexed view of a problem, built once from its course names and
+# expanded sessions ({"course", "type", "instructor"} dicts, see Problem).
+# A chromosome is one integer per session (sessions keep a fixed position),
+# holding the grid cell it is placed in: cell = time * n_rooms + room,
+# with time = day * n_slots + slot.
+class Catalogue:
+    def __init__(self, courses, sessions, days, time_slots, rooms_lecture, rooms_lab):
+        self.days = list(days)
+        self.time_slots = list(time_slots)
+        self.rooms = list(rooms_lecture) + list(rooms_lab)
+        self.courses = list(courses)
+
+        self.n_slots = len(self.time_slots)
+        self.n_times = len(self.days) * self.n_slots
+        self.n_rooms = len(self.rooms)
+        self.n_cells = self.n_times * self.n_rooms
+        self.dtype = np.uint16 if self.n_cells <= np.iinfo(np.uint16).max else np.uint32
+
+        # Rooms usable by each session type, padded into one matrix so a batch
+        # of sessions can draw rooms with a single fancy-indexing call
+        lecture_rooms = np.arange(len(rooms_lecture))
+        lab_rooms = np.arange(len(rooms_lecture), self.n_rooms)
+        self.type_rooms = [lecture_rooms, lab_rooms]
+        self.room_type = np.where(np.arange(self.n_rooms) < len(rooms_lecture), LECTURE, LAB)
+        width = max(len(lecture_rooms), len(lab_rooms), 1)
+        self.room_choices = np.zeros((2, width), dtype=np.int64)
+        self.room_counts = np.array([len(lecture_rooms), len(lab_rooms)])
+        for t, rooms in enumerate(self.type_rooms):
+            self.room_choices[t, :len(rooms)] = rooms
+
+        # Every (day, slot, room) cell a session of each type may use
+        times = np.arange(self.n_times)[:, None] * self.n_rooms
+        self.type_cells = [(times + rooms).ravel() for rooms in self.type_rooms]
+
+        course_index = {c: i for i, c in enumerate(self.courses)}
+        self.instructors = list(dict.fromkeys(s["instructor"] for s in sessions))
+        instructor_index = {person: i for i, person in enumerate(self.instructors)}
+        self.session_course = np.array([course_index[s["course"]] for s in sessions], dtype=np.int64)
+        self.session_type = np.array([SESSION_TYPES.index(s["type"]) for s in sessions], dtype=np.int64)
+        self.session_instructor = np.array([instructor_index[s["instructor"]] for s in sessions], dtype=np.int64)
+        self.n_sessions = len(sessions)
+        self.n_instructors = len(self.instructors)
+
+    def split(self, chromosome):
+        cells = np.asarray(chromosome, dtype=np.int64)
+        return cells // self.n_rooms, cells % self.n_rooms
+
+    def cells(self, times, rooms):
+        return (np.asarray(times, dtype=np.int64) * self.n_rooms + rooms).astype(self.dtype)
+
+    def random_rooms(self, sessions, rng):
+        types = self.session_type[sessions]
+        picks = (rng.random(len(types)) * self.room_counts[types]).astype(np.int64)
+        return self.room_choices[types, picks]
+
+
+# ------------------------- Converters -------------------------
+def decode_chromosome(catalogue, chromosome):
+    times, rooms = catalogue.split(chromosome)
+    schedule = []
+    for i in range(catalogue.n_sessions):
+        day, slot = divmod(int(times[i]), catalogue.n_slots)
+        schedule.append({
+            "course": catalogue.courses[catalogue.session_course[i]],
+            "type": SESSION_TYPES[catalogue.session_type[i]],
+            "instructor": catalogue.instructors[catalogue.session_instructor[i]],
+            "room": catalogue.rooms[rooms[i]],
+            "day": catalogue.days[day],
+            "slot": catalogue.time_slots[slot]
+        })
+    return schedule
+
+
+def match_schedule(catalogue, schedule, strict=True):
+    # Pairs each entry of a dict-form schedule with a session, by (course,
+    # type) in schedule order, and yields (entry, session, cell). strict
+    # raises ValueError for entries without a session, unknown day, slot or
+    # room names and missing sessions; otherwise such entries get session -1
+    # or cell -1, e.g. for schedules made before the problem changed.
+    positions = {}
+    for i in range(catalogue.n_sessions):
+        key = (catalogue.courses[catalogue.session_course[i]], SESSION_TYPES[catalogue.session_type[i]])
+        positions.setdefault(key, []).append(i)
+    day_index = {d: i for i, d in enumerate(catalogue.days)}
+    slot_index = {s: i for i, s in enumerate(catalogue.time_slots)}
+    room_index = {r: i for i, r in enumerate(catalogue.rooms)}
+
+    for lec in schedule:
+        free = positions.get((lec["course"], lec["type"]))
+        if not free:
+            if strict:
+                raise ValueError(f"Schedule has an unexpected {lec['type']} for {lec['course']!r}")
+            yield lec, -1, -1
+            continue
+        session = free.pop(0)
+        if lec["day"] not in day_index or lec["slot"] not in slot_index or lec["room"] not in room_index:
+            if strict:
+                raise ValueError(f"Schedule uses an unknown day, slot or room: {lec['day']!r}, "
+                                 f"{lec['slot']!r}, {lec['room']!r}")
+            yield lec, session, -1
+            continue
+        time = day_index[lec["day"]] * catalogue.n_slots + slot_index[lec["slot"]]
+        yield lec, session, time * catalogue.n_rooms + room_index[lec["room"]]
+    if strict and any(positions.values()):
+        raise ValueError("Schedule is missing sessions required by the catalogue")
+
+
+def encode_schedule(catalogue, schedule):
+    chromosome = np.zeros(catalogue.n_sessions, dtype=catalogue.dtype)
+    for _, session, cell in match_schedule(catalogue, schedule):
+        chromosome[session] = cell
+    return chromosome
+
+
+# ------------------------- Chromosome Operators -------------------------
+def random_chromosome(catalogue, rng):
+    # Sessions of each type take distinct cells of that type's rooms while
+    # any are free; past that the grid is full and clashes are unavoidable
+    chromosome = np.empty(catalogue.n_sessions, dtype=catalogue.dtype)
+    for t, cells in enumerate(catalogue.type_cells):
+        sessions = np.flatnonzero(catalogue.session_type == t)
+        if len(sessions) == 0:
+            continue
+        chromosome[sessions] = rng.choice(cells, size=len(sessions), replace=len(sessions) > len(cells))
+    return chromosome
@@ -0,0 +1,160 @@
+import json
+import numpy as np
+
+from constraints import Constraint
+from encoding import decode_chromosome
+from fitness import BINCOUNT_LIMIT
+
+ENROLLMENT_FILE = "enrollment.json"
+
+
+# ------------------------- Enrollment Index -------------------------
+# students is {student_id: [course, ...]}; courses the catalogue doesn't know
+# are ignored. Students are stored CSR-style (student -> courses) together
+# with the inverted index (course -> students). Students taking exactly the
+# same set of courses share a profile, so per-student work is done once per
+# profile and broadcast back. A student clash is a pair of the student's
+# sessions at the same time. Scoring a population doesn't look at students
+# or profiles at all: it uses a course x course co-enrolment table, so its
+# cost doesn't grow with the number of students or elective combinations.
+class Enrollment:
+    def __init__(self, catalogue, students):
+        self.catalogue = catalogue
+        self.student_ids = list(students)
+        self.student_index = {s: i for i, s in enumerate(self.student_ids)}
+        course_index = {c: i for i, c in enumerate(catalogue.courses)}
+
+        profiles = {}
+        profile_of, lengths, courses = [], [], []
+        for student in self.student_ids:
+            taken = sorted({course_index[c] for c in students[student] if c in course_index})
+            profile_of.append(profiles.setdefault(tuple(taken), len(profiles)))
+            lengths.append(len(taken))
+            courses.extend(taken)
+        self.n_students = len(self.student_ids)
+        self.student_ptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self.student_courses = np.array(courses, dtype=np.int64)
+
+        # Inverted index: students of course c are course_students[course_ptr[c]:course_ptr[c + 1]]
+        owners = np.repeat(np.arange(self.n_students), lengths)
+        order = np.argsort(self.student_courses, kind="stable")
+        self.course_students = owners[order]
+        self.course_ptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(self.student_courses, minlength=len(catalogue.courses))))).astype(np.int64)
+
+        # Profile -> sessions of its courses, ready for gathering times
+        self.profile_of = np.array(profile_of, dtype=np.int64)
+        self.n_profiles = len(profiles)
+        self.profile_weight = np.bincount(self.profile_of, minlength=self.n_profiles)
+        course_sessions = [np.flatnonzero(catalogue.session_course == c) for c in range(len(catalogue.courses))]
+        sessions = [np.concatenate([course_sessions[c] for c in taken] + [np.empty(0, dtype=np.int64)])
+                    for taken in profiles]
+        self.profile_ptr = np.concatenate(([0], np.cumsum([len(s) for s in sessions]))).astype(np.int64)
+        self.profile_sessions = np.concatenate(sessions + [np.empty(0, dtype=np.int64)]).astype(np.int64)
+        self.session_profile = np.repeat(np.arange(self.n_profiles), np.diff(self.profile_ptr))
+
+        # Co-enrolment over the courses anyone takes: coenrolled[a, b] students
+        # take both a and b (coenrolled[a, a]: students of a), counted over
+        # every ordered pair of each student's CSR entries
+        active = np.flatnonzero(self.course_ptr[1:] > self.course_ptr[:-1])
+        slot = np.full(len(catalogue.courses), -1, dtype=np.int64)
+        slot[active] = np.arange(len(active))
+        partners = np.asarray(lengths, dtype=np.int64)[owners]
+        firsts = np.repeat(np.arange(len(owners)), partners)
+        offsets = np.arange(len(firsts)) - np.repeat(np.cumsum(partners) - partners, partners)
+        seconds = self.student_ptr[owners[firsts]] + offsets
+        self.n_active = len(active)
+        keys = slot[self.student_courses[firsts]] * self.n_active + slot[self.student_courses[seconds]]
+        self.coenrolled = np.bincount(keys, minlength=self.n_active ** 2).reshape(
+            self.n_active, self.n_active).astype(np.float64)
+        self.active_sessions = np.flatnonzero(slot[catalogue.session_course] >= 0)
+        self.active_session_course = slot[catalogue.session_course[self.active_sessions]]
+        # Each session paired with itself, counted by the occupancy product below
+        self.self_pairs = self.coenrolled.diagonal()[self.active_session_course].sum()
+
+    def students_in(self, course):
+        c = self.catalogue.courses.index(course)
+        return [self.student_ids[i] for i in self.course_students[self.course_ptr[c]:self.course_ptr[c + 1]]]
+
+    def courses_of(self, student):
+        i = self.student_index[student]
+        return [self.catalogue.courses[c] for c in self.student_courses[self.student_ptr[i]:self.student_ptr[i + 1]]]
+
+    def _profile_times(self, chromosome):
+        return np.asarray(chromosome, dtype=np.int64)[self.profile_sessions] // self.catalogue.n_rooms
+
+    def student_clashes(self, chromosome):
+        # Per student: pairs of their sessions at the same time (k sessions at
+        # one time are k * (k - 1) / 2 clashes)
+        keys = self.session_profile * self.catalogue.n_times + self._profile_times(chromosome)
+        counts = np.bincount(keys, minlength=self.n_profiles * self.catalogue.n_times)
+        per_profile = (counts * (counts - 1) // 2).reshape(self.n_profiles, -1).sum(axis=1)
+        return per_profile[self.profile_of]
+
+    def population_clashes(self, population):
+        # Total student clashes per individual. With o[t] the number of
+        # sessions of each course at time t, o[t] @ coenrolled @ o[t] counts
+        # every same-time session pair once per student taking both courses,
+        # twice over, plus each session with itself. Individuals are scored
+        # in chunks so the occupancy matrix stays small.
+        population = np.atleast_2d(np.asarray(population)).astype(np.int64)
+        clashes = np.zeros(len(population), dtype=np.int64)
+        if self.active_sessions.size == 0:
+            return clashes
+        n_times = self.catalogue.n_times
+        step = max(1, BINCOUNT_LIMIT // (n_times * self.n_active))
+        for start in range(0, len(population), step):
+            times = population[start:start + step, self.active_sessions] // self.catalogue.n_rooms
+            rows = np.arange(len(times))[:, None] * n_times + times
+            occupancy = np.bincount((rows * self.n_active + self.active_session_course).ravel(),
+                                    minlength=len(times) * n_times * self.n_active
+                                    ).reshape(-1, self.n_active).astype(np.float64)
+            pairs = (occupancy * (occupancy @ self.coenrolled)).reshape(len(times), -1).sum(axis=1)
+            clashes[start:start + step] = np.rint((pairs - self.self_pairs) / 2)
+        return clashes
+
+    def timetables(self, chromosome, schedule=None):
+        # {student_id: [session dicts sorted by day and slot]} for every student.
+        # Sessions are decoded once and each profile's list is shared by its
+        # students, so treat the lists as read-only
+        schedule = schedule if schedule is not None else decode_chromosome(self.catalogue, chromosome)
+        cells = np.asarray(chromosome, dtype=np.int64)[self.profile_sessions]
+        ordered = self.profile_sessions[np.lexsort((cells, self.session_profile))].tolist()
+        ptr = self.profile_ptr.tolist()
+        lists = [[schedule[s] for s in ordered[ptr[p]:ptr[p + 1]]] for p in range(self.n_profiles)]
+        return {student: lists[p] for student, p in zip(self.student_ids, self.profile_of)}
+
+    def timetable(self, student, chromosome, schedule=None):
+        schedule = schedule if schedule is not None else decode_chromosome(self.catalogue, chromosome)
+        p = self.profile_of[self.student_index[student]]
+        sessions = self.profile_sessions[self.profile_ptr[p]:self.profile_ptr[p + 1]]
+        order = np.argsort(np.asarray(chromosome, dtype=np.int64)[sessions], kind="stable")
+        return [schedule[s] for s in sessions[order]]
+
+
+def load_enrollment(catalogue, source=ENROLLMENT_FILE):
+    # source may be a {student_id: [course, ...]} dict, a readable stream or a path
+    if isinstance(source, dict):
+        students = source
+    elif hasattr(source, "read"):
+        students = json.load(source)
+    else:
+        with open(source, "r") as f:
+            students = json.load(f)
+    return Enrollment(catalogue, students)
+
+
+# ------------------------- Fitness Term -------------------------
+class StudentClash(Constraint):
+    # Student clashes summed over all enrolled students, for ConstraintEngine
+    name = "student_clash"
+
+    def __init__(self, students, weight=1.0, hard=True):
+        super().__init__(weight, hard)
+        self.students = students
+
+    def compile(self, catalogue):
+        self.enrollment = Enrollment(catalogue, self.students)
+
+    def evaluate(self, cells, times, rooms):
+        return self.enrollment.population_clashes(cells)
@@ -0,0 +1,251 @@
+import calendar
+import csv
+import datetime
+import json
+import os
+import re
+import numpy as np
+
+from encoding import SESSION_TYPES, encode_schedule
+
+CSV_COLUMNS = ("schedule", "course", "type", "instructor", "room", "day", "slot")
+BINARY_MAGIC = b"TTBIN1\0\0"
+BINARY_ALIGN = 64
+
+
+# ------------------------- Inputs -------------------------
+# Every exporter takes schedules either as chromosomes of the catalogue or
+# in the dict form decode_chromosome returns, one at a time from any
+# iterable, so a batch is never held in memory as a whole.
+def _as_chromosome(catalogue, schedule):
+    if isinstance(schedule, np.ndarray):
+        return schedule.astype(np.int64)
+    return encode_schedule(catalogue, schedule).astype(np.int64)
+
+
+# ------------------------- CSV -------------------------
+def write_csv(catalogue, schedules, out, header=True):
+    # One row per session; `schedule` is the schedule's index in the batch
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    courses = [catalogue.courses[c] for c in catalogue.session_course]
+    types = [SESSION_TYPES[t] for t in catalogue.session_type]
+    instructors = [catalogue.instructors[i] for i in catalogue.session_instructor]
+    days = [catalogue.days[t // catalogue.n_slots] for t in range(catalogue.n_times)]
+    slots = [catalogue.time_slots[t % catalogue.n_slots] for t in range(catalogue.n_times)]
+    for k, schedule in enumerate(schedules):
+        times, rooms = catalogue.split(_as_chromosome(catalogue, schedule))
+        times, rooms = times.tolist(), rooms.tolist()
+        writer.writerows(zip([k] * catalogue.n_sessions, courses, types, instructors,
+                             [catalogue.rooms[r] for r in rooms], [days[t] for t in times],
+                             [slots[t] for t in times]))
+
+
+# ------------------------- iCalendar -------------------------
+# Each session becomes a weekly recurring event. Every string that can be
+# reused (per session, per time, per room) is built once per export, so an
+# event is just a join of precomputed pieces.
+def slot_hours(slot):
+    # "8-10" -> ((8, 0), (10, 0)); "2-4" -> ((14, 0), (16, 0)). Hours before
+    # 7 are read as afternoon, matching the default time_slots.
+    match = re.fullmatch(r"\s*(\d{1,2})(?::(\d\d))?\s*-\s*(\d{1,2})(?::(\d\d))?\s*", slot)
+    if match is None:
+        raise ValueError(f"Can't read a time range from slot {slot!r}; pass slot_times")
+    start_h, start_m, end_h, end_m = (int(g or 0) for g in match.groups())
+    if start_h < 7:
+        start_h += 12
+    while (end_h, end_m) <= (start_h, start_m):
+        end_h += 12
+    return (start_h, start_m), (end_h, end_m)
+
+
+def day_dates(days, week_start=None):
+    # Date of each day in the first week on or after week_start (default
+    # today); names that aren't weekdays are counted on from week_start
+    week_start = week_start or datetime.date.today()
+    names = [name.lower() for name in calendar.day_name]
+    dates = []
+    for i, day in enumerate(days):
+        if day.lower() in names:
+            ahead = (names.index(day.lower()) - week_start.weekday()) % 7
+            dates.append(week_start + datetime.timedelta(days=ahead))
+        else:
+            dates.append(week_start + datetime.timedelta(days=i))
+    return dates
+
+
+def _ics_text(value):
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _file_name(name):
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "unnamed"
+
+
+def _unique_name(name, used):
+    # Names that clean up to the same stem, ignoring case (for case-insensitive
+    # file systems), get -2, -3, ... so no calendar overwrites another
+    stem, n = name, 1
+    while stem.lower() in used:
+        n += 1
+        stem = f"{name}-{n}"
+    used.add(stem.lower())
+    return stem
+
+
+def write_icalendar(catalogue, schedule, directory, by="instructor", week_start=None, slot_times=None,
+                    uid_prefix="timetable", schedule_index=0):
+    # Writes <directory>/<name>.ics for every instructor (by="instructor") or
+    # room (by="room") with at least one session; returns the paths written.
+    # slot_times: {slot: ((start_h, start_m), (end_h, end_m))} for slots
+    # slot_hours can't read. Event UIDs hold schedule_index and the calendar's
+    # name, so calendars from different schedules of a batch, or by instructor
+    # and by room, can be imported side by side.
+    if by not in ("instructor", "room"):
+        raise ValueError(f"Unknown calendar owner {by!r}, expected 'instructor' or 'room'")
+    os.makedirs(directory, exist_ok=True)
+    slot_times = slot_times or {}
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    dates = day_dates(catalogue.days, week_start)
+    when = []
+    for t in range(catalogue.n_times):
+        date = dates[t // catalogue.n_slots]
+        slot = catalogue.time_slots[t % catalogue.n_slots]
+        (sh, sm), (eh, em) = slot_times.get(slot) or slot_hours(slot)
+        start = datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(hours=sh, minutes=sm)
+        end = datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(hours=eh, minutes=em)
+        when.append(f"DTSTART:{start:%Y%m%dT%H%M%S}\r\nDTEND:{end:%Y%m%dT%H%M%S}\r\nRRULE:FREQ=WEEKLY\r\n")
+    where = [f"LOCATION:{_ics_text(room)}\r\n" for room in catalogue.rooms]
+    what = [
+        f"-{i}@timetable\r\nDTSTAMP:{stamp}\r\n"
+        f"SUMMARY:{_ics_text(catalogue.courses[catalogue.session_course[i]])} "
+        f"{SESSION_TYPES[catalogue.session_type[i]]}\r\n"
+        f"DESCRIPTION:{_ics_text(catalogue.instructors[catalogue.session_instructor[i]])}\r\n"
+        for i in range(catalogue.n_sessions)
+    ]
+
+    times, rooms = catalogue.split(_as_chromosome(catalogue, schedule))
+    if catalogue.n_sessions == 0:
+        return []
+    owners, names = (catalogue.session_instructor, catalogue.instructors) if by == "instructor" \
+        else (rooms, catalogue.rooms)
+    order = np.lexsort((times, owners))
+    bounds = np.flatnonzero(np.r_[True, owners[order][1:] != owners[order][:-1], True])
+    times, rooms, order = times.tolist(), rooms.tolist(), order.tolist()
+
+    paths, used = [], set()
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        owner = names[owners[order[start]]]
+        stem = _unique_name(_file_name(owner), used)
+        begin = f"BEGIN:VEVENT\r\nUID:{uid_prefix}-{schedule_index}-{stem}"
+        path = os.path.join(directory, f"{stem}.ics")
+        with open(path, "w", newline="") as f:
+            f.write(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//timetable//export//EN\r\n"
+                    f"X-WR-CALNAME:{_ics_text(owner)}\r\n")
+            f.write("".join(begin + what[i] + when[times[i]] + where[rooms[i]] + "END:VEVENT\r\n"
+                            for i in order[start:end]))
+            f.write("END:VCALENDAR\r\n")
+        paths.append(path)
+    return paths
+
+
+# ------------------------- Compact Binary -------------------------
+# Layout: magic, a little-endian uint64 header length, a JSON header with the
+# string tables and session tables, zero padding to a 64-byte boundary, then
+# one row of integer cells (the catalogue's dtype) per schedule. The row
+# count follows from the file size, so schedules can be appended without
+# rewriting the header and the rows can be memory-mapped as one array.
+def _binary_header(catalogue):
+    return {
+        "dtype": np.dtype(catalogue.dtype).str,
+        "n_sessions": catalogue.n_sessions,
+        "courses": catalogue.courses,
+        "instructors": catalogue.instructors,
+        "rooms": catalogue.rooms,
+        "days": catalogue.days,
+        "time_slots": catalogue.time_slots,
+        "session_course": catalogue.session_course.tolist(),
+        "session_type": catalogue.session_type.tolist(),
+        "session_instructor": catalogue.session_instructor.tolist()
+    }
+
+
+class BinaryWriter:
+    def __init__(self, path, catalogue):
+        self.catalogue = catalogue
+        self.dtype = np.dtype(catalogue.dtype)
+        self.count = 0
+        self._file = open(path, "wb")
+        header = json.dumps(_binary_header(catalogue)).encode("utf-8")
+        preamble = len(BINARY_MAGIC) + 8 + len(header)
+        self._file.write(BINARY_MAGIC)
+        self._file.write(np.uint64(len(header)).astype("<u8").tobytes())
+        self._file.write(header)
+        self._file.write(b"\0" * (-preamble % BINARY_ALIGN))
+
+    def write(self, schedule):
+        row = _as_chromosome(self.catalogue, schedule).astype(self.dtype.newbyteorder("<"))
+        self._file.write(row.tobytes())
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_binary(catalogue, schedules, path):
+    with BinaryWriter(path, catalogue) as writer:
+        for schedule in schedules:
+            writer.write(schedule)
+        return writer.count
+
+
+def read_binary(path):
+    # Returns the header and a read-only memmap of shape (n_schedules, n_sessions)
+    with open(path, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path!r} is not a timetable binary export")
+        length = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        header = json.loads(f.read(length).decode("utf-8"))
+    offset = len(BINARY_MAGIC) + 8 + length
+    offset += -offset % BINARY_ALIGN
+    dtype = np.dtype(header["dtype"]).newbyteorder("<")
+    rows = (os.path.getsize(path) - offset) // (dtype.itemsize * max(header["n_sessions"], 1))
+    if rows == 0:
+        return header, np.empty((0, header["n_sessions"]), dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(rows, header["n_sessions"]))
+
+
+def decode_binary_row(header, row):
+    # A row back in decode_chromosome's dict form, using the file's own tables
+    n_rooms, n_slots = len(header["rooms"]), len(header["time_slots"])
+    schedule = []
+    for i, cell in enumerate(np.asarray(row, dtype=np.int64).tolist()):
+        day, slot = divmod(cell // n_rooms, n_slots)
+        schedule.append({
+            "course": header["courses"][header["session_course"][i]],
+            "type": SESSION_TYPES[header["session_type"][i]],
+            "instructor": header["instructors"][header["session_instructor"][i]],
+            "room": header["rooms"][cell % n_rooms],
+            "day": header["days"][day],
+            "slot": header["time_slots"][slot]
+        })
+    return schedule
+
+
+def matches_catalogue(header, catalogue):
+    # Rows can be used as chromosomes as-is only if every table is identical
+    return (header["courses"] == catalogue.courses and header["instructors"] == catalogue.instructors
+            and header["rooms"] == catalogue.rooms and header["days"] == catalogue.days
+            and header["time_slots"] == catalogue.time_slots
+            and header["session_course"] == catalogue.session_course.tolist()
+            and header["session_type"] == catalogue.session_type.tolist()
+            and header["session_instructor"] == catalogue.session_instructor.tolist())
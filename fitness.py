@@ -0,0 +1,103 @@
+import numpy as np
+
+# Above this many (individual, key) counters the bincount table gets larger
+# than sorting each row, so duplicates are counted by sorting instead
+BINCOUNT_LIMIT = 1 << 22
+
+
+# ------------------------- Batched Clash Counting -------------------------
+def duplicate_counts(keys, n_keys):
+    # Per row: how many keys repeat an earlier key in the same row
+    pop, n = keys.shape
+    if n == 0:
+        return np.zeros(pop, dtype=np.int64)
+    if pop * n_keys <= BINCOUNT_LIMIT:
+        flat = keys + np.arange(pop, dtype=np.int64)[:, None] * n_keys
+        counts = np.bincount(flat.ravel(), minlength=pop * n_keys).reshape(pop, n_keys)
+        return n - np.count_nonzero(counts, axis=1)
+    ordered = np.sort(keys, axis=1)
+    return np.count_nonzero(ordered[:, 1:] == ordered[:, :-1], axis=1)
+
+
+def population_clashes(catalogue, population):
+    # population: (pop_size, n_sessions) matrix of cell codes
+    cells = np.atleast_2d(np.asarray(population)).astype(np.int64)
+    times = cells // catalogue.n_rooms
+    instructor_keys = times * catalogue.n_instructors + catalogue.session_instructor
+    room_clashes = duplicate_counts(cells, catalogue.n_cells)
+    instructor_clashes = duplicate_counts(instructor_keys, catalogue.n_times * catalogue.n_instructors)
+    return room_clashes, instructor_clashes
+
+
+def population_fitness(catalogue, population):
+    # Same score as calculate_fitness for every row: 1 / (1 + penalty), penalty = 1 + clashes
+    room_clashes, instructor_clashes = population_clashes(catalogue, population)
+    return 1 / (2 + room_clashes + instructor_clashes)
+
+
+# ------------------------- Incremental Fitness -------------------------
+# Keeps occupancy counters for one chromosome so a single-gene move can be
+# priced and applied in O(1) instead of rescoring the whole schedule.
+class FitnessTracker:
+    def __init__(self, catalogue, chromosome):
+        self.catalogue = catalogue
+        self.chromosome = chromosome
+        cells = np.asarray(chromosome, dtype=np.int64)
+        self.room_count = np.bincount(cells, minlength=catalogue.n_cells)
+        self.instructor_count = np.bincount(self._instructor_keys(cells, np.arange(len(cells))),
+                                            minlength=catalogue.n_times * catalogue.n_instructors)
+        self.room_clashes = int(np.maximum(self.room_count - 1, 0).sum())
+        self.instructor_clashes = int(np.maximum(self.instructor_count - 1, 0).sum())
+
+    def _instructor_keys(self, cells, genes):
+        return cells // self.catalogue.n_rooms * self.catalogue.n_instructors + self.catalogue.session_instructor[genes]
+
+    def _instructor_key(self, cell, gene):
+        catalogue = self.catalogue
+        return cell // catalogue.n_rooms * catalogue.n_instructors + int(catalogue.session_instructor[gene])
+
+    @property
+    def clashes(self):
+        return self.room_clashes + self.instructor_clashes
+
+    @property
+    def penalty(self):
+        return 1 + self.clashes
+
+    @property
+    def fitness(self):
+        return 1 / (1 + self.penalty)
+
+    def conflicted_genes(self):
+        # Genes sharing their room cell or their instructor's time with another gene
+        cells = np.asarray(self.chromosome, dtype=np.int64)
+        keys = self._instructor_keys(cells, np.arange(len(cells)))
+        return np.flatnonzero((self.room_count[cells] > 1) | (self.instructor_count[keys] > 1))
+
+    def _deltas(self, gene, old, cell):
+        if old == cell:
+            return 0, 0
+        room = int(self.room_count[cell] >= 1) - int(self.room_count[old] >= 2)
+        old_key, new_key = self._instructor_key(old, gene), self._instructor_key(cell, gene)
+        if old_key == new_key:
+            return room, 0
+        instructor = int(self.instructor_count[new_key] >= 1) - int(self.instructor_count[old_key] >= 2)
+        return room, instructor
+
+    def delta(self, gene, cell):
+        # Change in penalty if gene moved to cell; nothing is modified
+        room, instructor = self._deltas(gene, int(self.chromosome[gene]), cell)
+        return room + instructor
+
+    def move(self, gene, cell):
+        old = int(self.chromosome[gene])
+        room, instructor = self._deltas(gene, old, cell)
+        if old != cell:
+            self.room_count[old] -= 1
+            self.room_count[cell] += 1
+            self.instructor_count[self._instructor_key(old, gene)] -= 1
+            self.instructor_count[self._instructor_key(cell, gene)] += 1
+            self.chromosome[gene] = cell
+            self.room_clashes += room
+            self.instructor_clashes += instructor
+        return room + instructor
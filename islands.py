@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from main import evolve, random_population, resolve_catalogue, score_population
+from encoding import decode_chromosome
+
+TOPOLOGIES = ("ring", "full")
+# Per-run options that can't be split across islands or sent to a worker process
+UNSUPPORTED_OPTIONS = ("profiler", "checkpoint_path", "start", "on_generation")
+
+
+# ------------------------- Island Epoch -------------------------
+# Runs in a worker process: evolves one island for up to `generations`
+# generations and hands back its population, RNG and history.
+def _run_epoch(catalogue, population, rng, generations, options):
+    population, best, history = evolve(catalogue, population, rng, generations, **options)
+    return population, rng, best, history
+
+
+# ------------------------- Migration -------------------------
+def _migration_targets(n_islands, topology):
+    if topology == "ring":
+        return [[(i + 1) % n_islands] for i in range(n_islands)]
+    return [[j for j in range(n_islands) if j != i] for i in range(n_islands)]
+
+
+def migrate(catalogue, populations, migrants, topology="ring", constraints=None):
+    # Each island sends copies of its best `migrants` individuals to its
+    # neighbours, which drop their worst individuals to make room
+    ranked = []
+    for population in populations:
+        order = np.argsort(-score_population(catalogue, population, constraints)[0], kind="stable")
+        ranked.append(population[order])
+
+    incoming = [[] for _ in populations]
+    for i, targets in enumerate(_migration_targets(len(populations), topology)):
+        for j in targets:
+            incoming[j].append(ranked[i][:migrants])
+
+    result = []
+    for population, arrivals in zip(ranked, incoming):
+        if arrivals:
+            arrivals = np.concatenate(arrivals)[:len(population) - 1]
+            population = population.copy()
+            population[len(population) - len(arrivals):] = arrivals
+        result.append(population)
+    return result
+
+
+# ------------------------- Island Genetic Algorithm -------------------------
+def island_genetic_algorithm(n_islands=4, pop_size=50, generations=100, migration_interval=10,
+                             migrants=2, topology="ring", seed=None, workers=None,
+                             return_islands=False, catalogue=None, seed_fraction=0.0, problem=None, **options):
+    # options go to evolve() on every island, as in genetic_algorithm.
+    # time_budget, patience and cancel apply to the whole run: they are
+    # checked here between epochs, and each epoch only gets the time left.
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+    unsupported = [name for name in UNSUPPORTED_OPTIONS if options.get(name) is not None]
+    if unsupported:
+        raise ValueError(f"Island mode doesn't support {', '.join(unsupported)}")
+    time_budget = options.pop("time_budget", None)
+    patience = options.pop("patience", None)
+    cancel = options.pop("cancel", None)
+    catalogue = resolve_catalogue(problem, catalogue, options)
+
+    # One independent, reproducible stream per island
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_islands)]
+    populations = [random_population(catalogue, pop_size, rng, seed_fraction) for rng in rngs]
+    island_histories = [[] for _ in range(n_islands)]
+    bests = [population[0] for population in populations]
+
+    executor = ProcessPoolExecutor(max_workers=workers or n_islands) if workers != 1 else None
+    started = time.perf_counter()
+    best_seen, best_gen = -1.0, 0
+    try:
+        done = 0
+        while done < generations:
+            epoch = min(migration_interval, generations - done)
+            epoch_options = options
+            if time_budget is not None:
+                epoch_options = dict(options, time_budget=time_budget - (time.perf_counter() - started))
+            args = [(catalogue, populations[i], rngs[i], epoch, epoch_options) for i in range(n_islands)]
+            if executor is None:
+                results = [_run_epoch(*a) for a in args]
+            else:
+                results = list(executor.map(_run_epoch, *zip(*args)))
+
+            stopped = False
+            for i, (population, rng, best, history) in enumerate(results):
+                populations[i], rngs[i], bests[i] = population, rng, best
+                island_histories[i].extend(history)
+                stopped = stopped or len(history) < epoch
+            for gen in range(done, max(len(h) for h in island_histories)):
+                fit = max(h[gen] for h in island_histories if gen < len(h))
+                if fit > best_seen:
+                    best_seen, best_gen = fit, gen
+            done += epoch
+            if stopped or (cancel is not None and cancel.is_set()):
+                break
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                break
+            if patience is not None and done - 1 - best_gen >= patience:
+                break
+            if done < generations:
+                populations = migrate(catalogue, populations, migrants, topology, options.get("constraints"))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # Overall history is the best fitness across islands at each generation
+    length = max(len(h) for h in island_histories)
+    fitness_history = [max(h[g] for h in island_histories if g < len(h)) for g in range(length)]
+    best_scores = score_population(catalogue, np.stack(bests), options.get("constraints"))[0]
+    best = decode_chromosome(catalogue, bests[int(np.argmax(best_scores))])
+
+    if return_islands:
+        return best, fitness_history, island_histories
+    return best, fitness_history
+
+
+if __name__ == "__main__":
+    import os
+    from main import display_schedule, calculate_fitness
+    best, fitness_history = island_genetic_algorithm(n_islands=os.cpu_count() or 1)
+    display_schedule(best)
+    print("Final Fitness:", calculate_fitness(best))
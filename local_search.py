@@ -0,0 +1,117 @@
+import math
+import time
+
+from fitness import FitnessTracker
+
+METHODS = ("tabu", "anneal")
+
+
+# ------------------------- Move Helpers -------------------------
+def _pick_gene(tracker, rng, movable=None):
+    # movable: optional boolean mask of genes that may be moved
+    genes = tracker.conflicted_genes()
+    if movable is not None:
+        genes = genes[movable[genes]]
+    if len(genes) == 0:
+        return None
+    return int(genes[rng.integers(len(genes))])
+
+
+def _candidate_cells(catalogue, gene, rng, k):
+    cells = catalogue.type_cells[catalogue.session_type[gene]]
+    if len(cells) == 0:
+        return cells
+    return cells[rng.integers(len(cells), size=k)]
+
+
+def _out_of_time(deadline):
+    return deadline is not None and time.perf_counter() >= deadline
+
+
+# ------------------------- Tabu Search -------------------------
+# Moves one clashing gene per step to the best of `candidates` sampled cells.
+# Returning a gene to a cell it just left is tabu for `tenure` steps unless
+# that move beats the best schedule found so far.
+def tabu_search(catalogue, chromosome, rng, max_evaluations=500, deadline=None, tenure=7, candidates=8,
+                movable=None):
+    tracker = FitnessTracker(catalogue, chromosome)
+    best, best_clashes = chromosome.copy(), tracker.clashes
+    tabu = {}
+    evaluations = step = 0
+
+    while evaluations < max_evaluations and tracker.clashes > 0 and not _out_of_time(deadline):
+        gene = _pick_gene(tracker, rng, movable)
+        if gene is None:
+            break
+        cells = _candidate_cells(catalogue, gene, rng, candidates)
+        if len(cells) == 0:
+            break
+        step += 1
+        chosen, chosen_delta = None, None
+        for cell in cells:
+            cell = int(cell)
+            delta = tracker.delta(gene, cell)
+            evaluations += 1
+            allowed = tabu.get((gene, cell), 0) < step or tracker.clashes + delta < best_clashes
+            if allowed and (chosen is None or delta < chosen_delta):
+                chosen, chosen_delta = cell, delta
+        if chosen is None:
+            continue
+
+        tabu[(gene, int(chromosome[gene]))] = step + tenure
+        tracker.move(gene, chosen)
+        if tracker.clashes < best_clashes:
+            best, best_clashes = chromosome.copy(), tracker.clashes
+
+    chromosome[:] = best
+    return best_clashes, evaluations
+
+
+# ------------------------- Simulated Annealing -------------------------
+# Moves one clashing gene per step to a random cell; worse moves are
+# accepted with probability exp(-delta / temperature).
+def simulated_annealing(catalogue, chromosome, rng, max_evaluations=500, deadline=None,
+                        temperature=1.0, cooling=0.995, movable=None):
+    tracker = FitnessTracker(catalogue, chromosome)
+    best, best_clashes = chromosome.copy(), tracker.clashes
+    evaluations = 0
+
+    while evaluations < max_evaluations and tracker.clashes > 0 and not _out_of_time(deadline):
+        gene = _pick_gene(tracker, rng, movable)
+        if gene is None:
+            break
+        cells = _candidate_cells(catalogue, gene, rng, 1)
+        if len(cells) == 0:
+            break
+        cell = int(cells[0])
+        delta = tracker.delta(gene, cell)
+        evaluations += 1
+        if delta <= 0 or rng.random() < math.exp(-delta / max(temperature, 1e-9)):
+            tracker.move(gene, cell)
+            if tracker.clashes < best_clashes:
+                best, best_clashes = chromosome.copy(), tracker.clashes
+        temperature *= cooling
+
+    chromosome[:] = best
+    return best_clashes, evaluations
+
+
+# ------------------------- Memetic Stage -------------------------
+def improve_elite(catalogue, population, rng, method="tabu", count=10, max_evaluations=2000,
+                  time_budget=None, **options):
+    # Improves population[:count] in place, sharing the evaluation and time
+    # budgets across the elite; returns the total number of move evaluations
+    if method not in METHODS:
+        raise ValueError(f"Unknown local search {method!r}, expected one of {METHODS}")
+    search = tabu_search if method == "tabu" else simulated_annealing
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    count = min(count, len(population))
+    per_individual = max_evaluations // max(count, 1)
+
+    evaluations = 0
+    for k in range(count):
+        if _out_of_time(deadline):
+            break
+        _, used = search(catalogue, population[k], rng, per_individual, deadline, **options)
+        evaluations += used
+    return evaluations
@@ -1,10 +1,19 @@
+import os
 import random
-import json
+import time
+import numpy as np
 import matplotlib.pyplot as plt
+from encoding import decode_chromosome
+from problem import load_problem as _load_problem
+from fitness import population_clashes
+from seeding import initial_population
+from local_search import improve_elite
+from operators import breed, top_order
+from profiling import NULL_PROFILER
+from checkpoint import save_checkpoint, load_checkpoint, chromosome_from_schedule
+from export import read_binary, decode_binary_row, matches_catalogue
 
-# ------------------------- Load Course Requirements from JSON -------------------------
-with open("data.json", "r") as f:
-    course_requirements = json.load(f)
+DATA_FILE = "data.json"
 
 rooms_lecture = ["R1", "R2", "R3"]
 rooms_lab = ["Lab1", "Lab2", "Lab3"]
@@ -12,45 +21,67 @@ days = ["Saturday", "Sunday", "Monday", "Tuesday", "Wednesday"]
 time_slots = ["8-10", "10-12", "12-2", "2-4", "4-6"]
 all_slots = [(d, s) for d in days for s in time_slots]  # 5x5 = 25
 
+# ------------------------- Load Course Requirements -------------------------
+# Nothing is read at import time. Problems are loaded on demand from a path,
+# a dict or a stream and passed to the functions below; without one they
+# fall back to DATA_FILE, re-read whenever it changes on disk.
+_default_problem = None
+_default_mtime = None
+
+def load_problem(source=DATA_FILE, day_names=None, slot_names=None, lecture_rooms=None, lab_rooms=None,
+                 constraints=None):
+    # Module constants are only defaults; any grid dimension can be overridden.
+    # constraints: extra constraints.Constraint objects scored on top of clashes
+    return _load_problem(
+        source,
+        days if day_names is None else day_names,
+        time_slots if slot_names is None else slot_names,
+        rooms_lecture if lecture_rooms is None else lecture_rooms,
+        rooms_lab if lab_rooms is None else lab_rooms,
+        constraints
+    )
+
+def default_problem():
+    global _default_problem, _default_mtime
+    mtime = os.path.getmtime(DATA_FILE)
+    if _default_problem is None or mtime != _default_mtime:
+        _default_problem, _default_mtime = load_problem(DATA_FILE), mtime
+    return _default_problem
+
+def __getattr__(name):
+    # main.course_requirements still works, but reads data.json lazily
+    if name == "course_requirements":
+        return default_problem().course_requirements
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # ------------------------- Expand Courses -------------------------
-def expanded_courses():
-    expanded = []
-    for course, details in course_requirements.items():
-        if "lectures" in details:
-            for _ in range(details["lectures"]["hours"]):
-                expanded.append({
-                    "course": course,
-                    "type": "lecture",
-                    "instructor": details["lectures"]["lecturer"]
-                })
-        if "labs" in details:
-            for _ in range(details["labs"]["hours"]):
-                expanded.append({
-                    "course": course,
-                    "type": "lab",
-                    "instructor": details["labs"]["ta"]
-                })
-    return expanded
+def expanded_courses(problem=None):
+    problem = problem or default_problem()
+    return [dict(session) for session in problem.sessions]
 
 # ------------------------- Create Chromosome -------------------------
-def create_random_schedule():
+def create_random_schedule(problem=None):
+    # Each session takes a free (day, slot, room) cell of its room type
+    problem = problem or default_problem()
+    free = {
+        "lecture": [(d, s, r) for d, s in problem.all_slots for r in problem.rooms_lecture],
+        "lab": [(d, s, r) for d, s in problem.all_slots for r in problem.rooms_lab]
+    }
+    for cells in free.values():
+        random.shuffle(cells)
     schedule = []
-    slots = all_slots[:]
-    random.shuffle(slots)
-    expanded = expanded_courses()
-    random.shuffle(expanded)
-    for i in range(len(expanded)):
-        lec_type = expanded[i]["type"]
-        room = random.choice(rooms_lab if lec_type == "lab" else rooms_lecture)
-        lec = {
-            "course": expanded[i]["course"],
-            "type": lec_type,
-            "instructor": expanded[i]["instructor"],
+    for course in problem.sessions:
+        cells = free[course["type"]]
+        day, slot, room = cells.pop() if cells else random.choice(problem.all_slots) + (
+            random.choice(problem.rooms_for(course["type"])),)
+        schedule.append({
+            "course": course["course"],
+            "type": course["type"],
+            "instructor": course["instructor"],
             "room": room,
-            "day": slots[i][0],
-            "slot": slots[i][1]
-        }
-        schedule.append(lec)
+            "day": day,
+            "slot": slot
+        })
     return schedule
 
 # ------------------------- Fitness Function -------------------------
@@ -77,68 +108,265 @@ def calculate_fitness(schedule):
 
 # ------------------------- Genetic Operators -------------------------
 def crossover(p1, p2):
+    # Genes are copied so mutating the child never edits a parent's genes
     point = random.randint(1, len(p1)-2)
-    return p1[:point] + p2[point:]
+    return [dict(gene) for gene in p1[:point] + p2[point:]]
 
-def mutate(schedule, rate=0.3):
+def mutate(schedule, rate=0.3, problem=None):
+    problem = problem or default_problem()
     for gene in schedule:
         if random.random() < rate:
-            gene["day"], gene["slot"] = random.choice(all_slots)
-            gene["room"] = random.choice(rooms_lab if gene["type"] == "lab" else rooms_lecture)
+            gene["day"], gene["slot"] = random.choice(problem.all_slots)
+            gene["room"] = random.choice(problem.rooms_for(gene["type"]))
     return schedule
 
 # ------------------------- Genetic Algorithm -------------------------
-def genetic_algorithm(pop_size=50, generations=100):
-    population = [create_random_schedule() for _ in range(pop_size)]
-    fitness_history = []
-
-    for gen in range(generations):
-        population = sorted(population, key=calculate_fitness, reverse=True)
-        best = population[0]
-        best_fit = calculate_fitness(best)
-        fitness_history.append(best_fit)
-        if best_fit >= 0.99:
-            break
-
-        new_gen = population[:10]
-        while len(new_gen) < pop_size:
-            p1, p2 = random.sample(population[:25], 2)
-            child = crossover(p1, p2)
-            child = mutate(child)
-            new_gen.append(child)
-        population = new_gen
-
-    return best, fitness_history
+def resolve_catalogue(problem, catalogue, options):
+    # The problem's compiled constraints are used unless the caller passes others
+    if catalogue is not None:
+        return catalogue
+    problem = load_problem(problem) if problem is not None else default_problem()
+    if problem.constraints is not None:
+        options.setdefault("constraints", problem.constraints)
+    return problem.catalogue
+
+def score_population(catalogue, population, constraints=None):
+    # Scores, room clashes, instructor clashes and the constraint violation
+    # matrix (None without constraints); fitness is 1 / (2 + total penalty)
+    room_clashes, instructor_clashes = population_clashes(catalogue, population)
+    penalty = room_clashes + instructor_clashes
+    violations = None
+    if constraints is not None:
+        violations = constraints.violations(population)
+        penalty = penalty + constraints.penalties(violations)
+    return 1 / (2 + penalty), room_clashes, instructor_clashes, violations
+
+def generation_stream(catalogue, population, rng, generations, elite=10, parents=25, crossover="one_point",
+                      mutation_rate=0.3, selection="truncation", local_search=None, search_options=None,
+                      time_budget=None, patience=None, cancel=None, profiler=NULL_PROFILER,
+                      checkpoint_path=None, checkpoint_every=10, start=None, constraints=None):
+    # Yields one snapshot dict per generation and returns the final population.
+    # The run stops early when the schedule is clash-free, when cancel.is_set(),
+    # after time_budget seconds, after `patience` generations without a better
+    # best score, or when a truthy value is sent into the generator.
+    # selection is "truncation" (from the best `parents`), "tournament" or "rank".
+    # local_search ("tabu" or "anneal") adds a memetic step on the elite.
+    # profiler (a profiling.GAProfiler) records per-phase timings.
+    # With checkpoint_path, the population, RNG state and counters are saved
+    # every checkpoint_every generations; start is a load_checkpoint() dict
+    # to continue from (population and rng are then taken from it).
+    # constraints (a constraints.ConstraintEngine) adds weighted extra penalties.
+    # Two buffers are allocated once and swapped: one holds the generation
+    # with its best max(elite, parents) individuals sorted to the front,
+    # breed() writes the next generation into the other.
+    start = start or {}
+    if "population" in start:
+        population, rng = start["population"], start["rng"]
+    first_gen = start.get("generation", 0)
+    history = list(start.get("fitness_history", []))
+    evaluations = start.get("evaluations", 0)
+    best_seen, best_gen = start.get("best_seen", -1.0), start.get("best_gen", 0)
+    current = np.array(population, copy=True)
+    spare = np.empty_like(current)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        for gen in range(first_gen, generations):
+            profiler.start_generation()
+            with profiler.phase("fitness"):
+                scores, room_clashes, instructor_clashes, violations = score_population(catalogue, current, constraints)
+            evaluations += len(current)
+            profiler.record_children(scores)
+            with profiler.phase("selection"):
+                order = top_order(scores, max(elite, parents, 1))
+                np.take(current, order, axis=0, out=spare)
+                current, spare = spare, current
+                scores, room_clashes, instructor_clashes = scores[order], room_clashes[order], instructor_clashes[order]
+                if violations is not None:
+                    violations = violations[order]
+            if local_search is not None:
+                with profiler.phase("local_search"):
+                    # Local search only sees room and instructor clashes, so
+                    # with constraints an elite can come back worse overall;
+                    # those keep their pre-search genes and scores
+                    before = current[:elite].copy()
+                    improve_elite(catalogue, current, rng, local_search, elite, **(search_options or {}))
+                    elite_scores, elite_rooms, elite_instructors, elite_violations = score_population(
+                        catalogue, current[:elite], constraints)
+                    evaluations += len(elite_scores)
+                    worse = elite_scores < scores[:len(elite_scores)]
+                    if worse.any():
+                        current[:len(before)][worse] = before[worse]
+                        elite_scores[worse] = scores[:len(worse)][worse]
+                        elite_rooms[worse] = room_clashes[:len(worse)][worse]
+                        elite_instructors[worse] = instructor_clashes[:len(worse)][worse]
+                        if violations is not None:
+                            elite_violations[worse] = violations[:len(worse)][worse]
+                    order = np.argsort(-elite_scores, kind="stable")
+                    current[:elite], scores[:elite] = current[order], elite_scores[order]
+                    room_clashes[:elite], instructor_clashes[:elite] = elite_rooms[order], elite_instructors[order]
+                    if violations is not None:
+                        violations[:elite] = elite_violations[order]
+
+            best_fit = float(scores[0])
+            history.append(best_fit)
+            if best_fit > best_seen:
+                best_seen, best_gen = best_fit, gen
+            elapsed = time.perf_counter() - started
+            stop = None
+            if best_fit >= 0.5:  # penalty 1: no clashes left, the best score possible
+                stop = "solved"
+            elif cancel is not None and cancel.is_set():
+                stop = "cancelled"
+            elif time_budget is not None and elapsed >= time_budget:
+                stop = "time_budget"
+            elif patience is not None and gen - best_gen >= patience:
+                stop = "stagnation"
+            elif gen == generations - 1:
+                stop = "generations"
+
+            snapshot = {
+                "generation": gen,
+                "best": current[0].copy(),
+                "best_fitness": best_fit,
+                "mean_fitness": float(scores.mean()),
+                "worst_fitness": float(scores.min()),
+                "room_clashes": int(room_clashes[0]),
+                "instructor_clashes": int(instructor_clashes[0]),
+                "constraint_violations": constraints.breakdown(violations[0]) if constraints is not None else {},
+                "elapsed": elapsed,
+                "evaluations": evaluations,
+                "evaluations_per_second": evaluations / elapsed if elapsed > 0 else 0.0,
+                "stop": stop
+            }
+            if stop in ("solved", "cancelled", "time_budget", "stagnation"):
+                profiler.end_generation(gen)
+                yield snapshot
+                break
+            if (yield snapshot):
+                profiler.end_generation(gen)
+                break
+
+            first, second = breed(catalogue, current, spare, rng, elite, parents, crossover, mutation_rate, profiler,
+                                  selection, scores)
+            if profiler.enabled:
+                profiler.record_parents(scores, first, second, min(elite, len(current)))
+            current, spare = spare, current
+            profiler.end_generation(gen)
+            if checkpoint_path is not None and (gen + 1) % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, current, rng, gen + 1, history, best_seen, best_gen, evaluations)
+    finally:
+        profiler.stop()
+
+    return current
+
+def evolve(catalogue, population, rng, generations, on_generation=None, **options):
+    # Runs generation_stream to the end; returns the next population, the
+    # best individual of the last sorted generation and the fitness history
+    # (including the generations before a resumed checkpoint).
+    # on_generation(snapshot) is called every generation; a truthy result stops the run.
+    fitness_history = list((options.get("start") or {}).get("fitness_history", []))
+    best = population[0]
+    stream = generation_stream(catalogue, population, rng, generations, **options)
+    snapshot = next(stream, None)
+    while snapshot is not None:
+        fitness_history.append(snapshot["best_fitness"])
+        best = snapshot["best"]
+        try:
+            snapshot = stream.send(bool(on_generation is not None and on_generation(snapshot)))
+        except StopIteration as finished:
+            return finished.value, best, fitness_history
+    return population, best, fitness_history
+
+def random_population(catalogue, pop_size, rng, seed_fraction=0.0):
+    # seed_fraction of the population comes from the constructive seeder
+    return initial_population(catalogue, pop_size, rng, seed_fraction)
+
+def _warm_rows(catalogue, path, limit, rng):
+    # Schedules from a binary export, as chromosomes of this catalogue
+    header, rows = read_binary(path)
+    rows = rows[:limit]
+    if matches_catalogue(header, catalogue):
+        return np.array(rows, dtype=catalogue.dtype)
+    return np.array([chromosome_from_schedule(catalogue, decode_binary_row(header, row), rng) for row in rows],
+                    dtype=catalogue.dtype).reshape(-1, catalogue.n_sessions)
+
+def _start_population(catalogue, pop_size, seed, seed_fraction, resume, warm_start, options):
+    # Resuming restores the checkpointed population and RNG exactly; a warm
+    # start puts an earlier schedule in as the first individual, or a binary
+    # export's schedules (a path, see export.py) in as the first individuals
+    if resume is not None and os.path.exists(resume):
+        state = load_checkpoint(resume)
+        if state["population"].shape[1] != catalogue.n_sessions:
+            raise ValueError(f"Checkpoint {resume!r} does not match this problem's sessions")
+        options["start"] = state
+        return state["population"], state["rng"]
+    rng = np.random.default_rng(seed)
+    population = random_population(catalogue, pop_size, rng, seed_fraction)
+    if isinstance(warm_start, (str, os.PathLike)):
+        rows = _warm_rows(catalogue, warm_start, pop_size, rng)
+        population[:len(rows)] = rows
+    elif warm_start is not None:
+        population[0] = chromosome_from_schedule(catalogue, warm_start, rng)
+    return population, rng
+
+def genetic_algorithm_stream(pop_size=50, generations=100, seed=None, catalogue=None, seed_fraction=0.0,
+                             problem=None, resume=None, warm_start=None, **options):
+    # Generator form of genetic_algorithm: yields generation_stream's snapshots;
+    # decode snapshot["best"] with decode_chromosome(problem.catalogue, ...)
+    catalogue = resolve_catalogue(problem, catalogue, options)
+    population, rng = _start_population(catalogue, pop_size, seed, seed_fraction, resume, warm_start, options)
+    return (yield from generation_stream(catalogue, population, rng, generations, **options))
+
+def genetic_algorithm(pop_size=50, generations=100, seed=None, catalogue=None, seed_fraction=0.0,
+                      problem=None, resume=None, warm_start=None, **options):
+    # problem: a Problem, requirements dict, stream or path (default DATA_FILE).
+    # resume: checkpoint file to continue from when it exists (pair it with
+    # checkpoint_path=resume to keep checkpointing); warm_start: a schedule in
+    # dict form, e.g. a previous semester's best, or the path of a binary
+    # export of several schedules, to seed the population with.
+    # options go to evolve()/generation_stream(): elite, parents, crossover, mutation_rate,
+    # selection, local_search, search_options, time_budget, patience, cancel, on_generation,
+    # profiler, checkpoint_path, checkpoint_every, constraints
+    catalogue = resolve_catalogue(problem, catalogue, options)
+    population, rng = _start_population(catalogue, pop_size, seed, seed_fraction, resume, warm_start, options)
+    _, best, fitness_history = evolve(catalogue, population, rng, generations, **options)
+    return decode_chromosome(catalogue, best), fitness_history
 
 # ------------------------- Display Timetable -------------------------
-def display_schedule(schedule):
-    timetable = {d: {s: None for s in time_slots} for d in days}
+def display_schedule(schedule, day_names=None, slot_names=None):
+    day_names = days if day_names is None else day_names
+    slot_names = time_slots if slot_names is None else slot_names
+    # Parallel sessions in the same (day, slot) are stacked under each other
+    timetable = {d: {s: [] for s in slot_names} for d in day_names}
     for lec in schedule:
-        timetable[lec["day"]][lec["slot"]] = (lec["course"], lec["instructor"], lec["room"], lec["type"])
+        timetable[lec["day"]][lec["slot"]].append((lec["course"], lec["instructor"], lec["room"], lec["type"]))
 
     width = 25
     print(f"{'Day':<12}", end="")
-    for slot in time_slots:
+    for slot in slot_names:
         print(f"| {slot:^{width}}", end="")
-    print("\n" + "-" * (12 + len(time_slots)*(width+3)))
-
-    for day in days:
-        print(f"{day:<12}", end="")
-        for slot in time_slots:
-            entry = timetable[day][slot]
-            label = f"{entry[0]} ({'Lec' if entry[3] == 'lecture' else 'Lab'})" if entry else ""
-            print(f"| {label:^{width}}", end="")
-        print()
-        print(f"{'':<12}", end="")
-        for slot in time_slots:
-            entry = timetable[day][slot]
-            print(f"| {entry[1] if entry else '':^{width}}", end="")
-        print()
-        print(f"{'':<12}", end="")
-        for slot in time_slots:
-            entry = timetable[day][slot]
-            print(f"| {entry[2] if entry else '':^{width}}", end="")
-        print("\n" + "-" * (12 + len(time_slots)*(width+3)))
+    print("\n" + "-" * (12 + len(slot_names)*(width+3)))
+
+    for day in day_names:
+        depth = max([len(timetable[day][slot]) for slot in slot_names] + [1])
+        for row in range(depth):
+            entries = [timetable[day][slot][row] if row < len(timetable[day][slot]) else None
+                       for slot in slot_names]
+            print(f"{day if row == 0 else '':<12}", end="")
+            for entry in entries:
+                label = f"{entry[0]} ({'Lec' if entry[3] == 'lecture' else 'Lab'})" if entry else ""
+                print(f"| {label:^{width}}", end="")
+            print()
+            print(f"{'':<12}", end="")
+            for entry in entries:
+                print(f"| {entry[1] if entry else '':^{width}}", end="")
+            print()
+            print(f"{'':<12}", end="")
+            for entry in entries:
+                print(f"| {entry[2] if entry else '':^{width}}", end="")
+            print()
+        print("-" * (12 + len(slot_names)*(width+3)))
 
 if __name__ == "__main__":
     best, fitness_history = genetic_algorithm()
@@ -0,0 +1,179 @@
+import time
+import numpy as np
+
+from main import resolve_catalogue, random_population
+from constraints import InstructorGaps
+from encoding import decode_chromosome
+from fitness import population_clashes
+from operators import CROSSOVERS, mutate_population
+
+OBJECTIVES = ("clashes", "idle_gaps", "rooms_used", "day_imbalance")
+
+
+# ------------------------- Objectives -------------------------
+# All objectives are minimised:
+#   clashes        room + instructor clashes (+ hard constraint violations)
+#   idle_gaps      idle slots between an instructor's sessions of a day
+#   rooms_used     distinct rooms in use; fewer means better room utilisation
+#   day_imbalance  standard deviation of the number of sessions per day
+def population_objectives(catalogue, population, gaps, constraints=None):
+    cells = np.atleast_2d(np.asarray(population)).astype(np.int64)
+    times, rooms = cells // catalogue.n_rooms, cells % catalogue.n_rooms
+    pop, n_days = len(cells), len(catalogue.days)
+    rows = np.arange(pop)[:, None]
+
+    room_clashes, instructor_clashes = population_clashes(catalogue, population)
+    clashes = (room_clashes + instructor_clashes).astype(np.float64)
+    if constraints is not None:
+        clashes += constraints.violations(population)[:, constraints.hard].sum(axis=1)
+    used = np.bincount((rows * catalogue.n_rooms + rooms).ravel(), minlength=pop * catalogue.n_rooms)
+    per_day = np.bincount((rows * n_days + times // catalogue.n_slots).ravel(), minlength=pop * n_days)
+    return np.column_stack((
+        clashes,
+        gaps.evaluate(cells, times, rooms),
+        (used.reshape(pop, -1) > 0).sum(axis=1),
+        per_day.reshape(pop, -1).std(axis=1)
+    )).astype(np.float64)
+
+
+# ------------------------- Non-dominated Sorting -------------------------
+def non_dominated_sort(objectives, block=256):
+    # Front index per row (0 = Pareto front). The domination matrix is built
+    # with broadcasting, `block` rows at a time to bound memory, and fronts
+    # are peeled off by subtracting the current front's domination counts.
+    n = len(objectives)
+    dominates = np.empty((n, n), dtype=bool)
+    for start in range(0, n, block):
+        a = objectives[start:start + block, None, :]
+        b = objectives[None, :, :]
+        dominates[start:start + block] = (a <= b).all(axis=2) & (a < b).any(axis=2)
+    remaining = dominates.sum(axis=0)
+    ranks = np.full(n, -1, dtype=np.int64)
+    front, current = 0, np.flatnonzero(remaining == 0)
+    while current.size:
+        ranks[current] = front
+        remaining -= dominates[current].sum(axis=0)
+        current = np.flatnonzero((remaining == 0) & (ranks < 0))
+        front += 1
+    return ranks
+
+
+def crowding_distance(objectives, ranks):
+    # Crowding distance within each front, for all fronts at once: rows are
+    # sorted by (front, objective) and each neighbour gap is normalised by
+    # its front's range; front boundaries get infinity
+    n, m = objectives.shape
+    distance = np.zeros(n)
+    if n == 0:
+        return distance
+    for k in range(m):
+        order = np.lexsort((objectives[:, k], ranks))
+        values, fronts = objectives[order, k], ranks[order]
+        starts = np.flatnonzero(np.r_[True, fronts[1:] != fronts[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        span = np.repeat(values[ends] - values[starts], ends - starts + 1)
+        gap = np.zeros(n)
+        gap[1:-1] = values[2:] - values[:-2]
+        gap = np.divide(gap, span, out=np.zeros(n), where=span > 0)
+        gap[starts] = np.inf
+        gap[ends] = np.inf
+        distance[order] += gap
+    return distance
+
+
+def crowded_order(objectives):
+    # Indices sorted by front, then by decreasing crowding distance
+    ranks = non_dominated_sort(objectives)
+    distance = crowding_distance(objectives, ranks)
+    return np.lexsort((-distance, ranks)), ranks
+
+
+# ------------------------- NSGA-II Loop -------------------------
+def nsga2_stream(pop_size=100, generations=100, seed=None, catalogue=None, seed_fraction=0.0, problem=None,
+                 crossover="uniform", mutation_rate=0.3, time_budget=None, cancel=None, constraints=None):
+    # Yields one snapshot per generation with the size and per-objective
+    # minimum of the current Pareto front; returns the final population sorted
+    # by crowded comparison together with its objectives and front ranks.
+    if crossover not in CROSSOVERS:
+        raise ValueError(f"Unknown crossover {crossover!r}, expected one of {tuple(CROSSOVERS)}")
+    options = {} if constraints is None else {"constraints": constraints}
+    catalogue = resolve_catalogue(problem, catalogue, options)
+    constraints = options.get("constraints")
+    gaps = InstructorGaps()
+    gaps.compile(catalogue)
+
+    rng = np.random.default_rng(seed)
+    population = random_population(catalogue, pop_size, rng, seed_fraction)
+    objectives = population_objectives(catalogue, population, gaps, constraints)
+    order, ranks = crowded_order(objectives)
+    population, objectives, ranks = population[order], objectives[order], ranks[order]
+    combined = np.empty((2 * pop_size, catalogue.n_sessions), dtype=population.dtype)
+    started = time.perf_counter()
+
+    for gen in range(generations):
+        # Binary tournaments on crowded order: population is sorted, so the
+        # lower of two random indices wins
+        picks = rng.integers(pop_size, size=(4, pop_size))
+        first, second = np.minimum(picks[0], picks[1]), np.minimum(picks[2], picks[3])
+        combined[:pop_size] = population
+        children = combined[pop_size:]
+        CROSSOVERS[crossover](catalogue, population, first, second, children, rng)
+        mutate_population(catalogue, children, rng, mutation_rate)
+
+        child_objectives = population_objectives(catalogue, children, gaps, constraints)
+        all_objectives = np.concatenate((objectives, child_objectives))
+        # Whole fronts are kept before any later one, so the survivors' ranks
+        # from the combined sort are still exact
+        order, all_ranks = crowded_order(all_objectives)
+        keep = order[:pop_size]
+        population, objectives, ranks = combined[keep], all_objectives[keep], all_ranks[keep]
+
+        elapsed = time.perf_counter() - started
+        front = objectives[ranks == 0]
+        stop = None
+        if cancel is not None and cancel.is_set():
+            stop = "cancelled"
+        elif time_budget is not None and elapsed >= time_budget:
+            stop = "time_budget"
+        elif gen == generations - 1:
+            stop = "generations"
+        snapshot = {
+            "generation": gen,
+            "front_size": len(front),
+            "best": dict(zip(OBJECTIVES, front.min(axis=0).tolist())),
+            "elapsed": elapsed,
+            "stop": stop
+        }
+        if stop is not None:
+            yield snapshot
+            break
+        if (yield snapshot):
+            break
+
+    return population, objectives, ranks
+
+
+def nsga2(pop_size=100, generations=100, seed=None, catalogue=None, seed_fraction=0.0, problem=None,
+          on_generation=None, **options):
+    # Multi-objective counterpart of main.genetic_algorithm. Returns the Pareto
+    # front as a list of {"schedule": ..., "objectives": {name: value}},
+    # clash-free schedules first, duplicates removed.
+    # options: crossover, mutation_rate, time_budget, cancel, constraints
+    resolved = {} if options.get("constraints") is None else {"constraints": options["constraints"]}
+    catalogue = resolve_catalogue(problem, catalogue, resolved)
+    options["constraints"] = resolved.get("constraints")
+    stream = nsga2_stream(pop_size, generations, seed, catalogue, seed_fraction, **options)
+    try:
+        snapshot = next(stream)
+        while True:
+            snapshot = stream.send(bool(on_generation is not None and on_generation(snapshot)))
+    except StopIteration as finished:
+        population, objectives, ranks = finished.value
+
+    front = np.flatnonzero(ranks == 0)
+    _, unique = np.unique(population[front], axis=0, return_index=True)
+    front = front[np.sort(unique)]
+    front = front[np.lexsort(objectives[front].T[::-1])]
+    return [{"schedule": decode_chromosome(catalogue, population[i]),
+             "objectives": dict(zip(OBJECTIVES, objectives[i].tolist()))}
+            for i in front]
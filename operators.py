@@ -0,0 +1,155 @@
+import numpy as np
+
+from profiling import NULL_PROFILER
+
+
+# ------------------------- Crossover Variants -------------------------
+# Each variant fills out[k] from population[first[k]] and population[second[k]].
+# Children are written into `out`; parents are only ever read.
+def one_point_crossover(catalogue, population, first, second, out, rng):
+    n = population.shape[1]
+    points = rng.integers(1, max(n - 1, 2), size=len(first))
+    mask = np.arange(n) < points[:, None]
+    np.copyto(out, np.where(mask, population[first], population[second]))
+
+
+def uniform_crossover(catalogue, population, first, second, out, rng):
+    mask = rng.random(out.shape) < 0.5
+    np.copyto(out, np.where(mask, population[first], population[second]))
+
+
+def course_crossover(catalogue, population, first, second, out, rng):
+    # All sessions of a course come from the same parent
+    course_mask = rng.random((len(first), len(catalogue.courses))) < 0.5
+    mask = course_mask[:, catalogue.session_course]
+    np.copyto(out, np.where(mask, population[first], population[second]))
+
+
+def order_crossover(catalogue, population, first, second, out, rng):
+    # OX within each room type: a segment is copied from the first parent and
+    # the other sessions take the second parent's cells in order, skipping
+    # cells already used, so parents without room clashes give a child
+    # without room clashes
+    groups = [np.flatnonzero(catalogue.session_type == t) for t in range(len(catalogue.type_rooms))]
+    for k in range(len(first)):
+        p1, p2 = population[first[k]], population[second[k]]
+        for sessions in groups:
+            size = len(sessions)
+            if size == 0:
+                continue
+            a, b = np.sort(rng.integers(0, size + 1, size=2))
+            segment = p1[sessions[a:b]]
+            rest = np.concatenate((sessions[:a], sessions[b:]))
+            pool = np.concatenate((p2[sessions], p1[rest]))
+            pool = pool[~np.isin(pool, segment)]
+            _, first_seen = np.unique(pool, return_index=True)
+            fill = pool[np.sort(first_seen)][:len(rest)]
+            if len(fill) < len(rest):
+                fill = np.concatenate((fill, p2[rest[len(fill):]]))
+            out[k, sessions[a:b]] = segment
+            out[k, rest] = fill
+
+
+CROSSOVERS = {
+    "one_point": one_point_crossover,
+    "uniform": uniform_crossover,
+    "course": course_crossover,
+    "order": order_crossover
+}
+
+
+# ------------------------- Partial Ordering -------------------------
+def top_order(scores, k):
+    # Permutation putting the k best scores first, sorted best first; the rest
+    # follow unordered. argpartition keeps this O(n + k log k) instead of a
+    # full O(n log n) sort when only the elite and parent pool need ranking.
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.arange(n)
+    if k < n:
+        order = np.argpartition(-scores, k - 1)
+    else:
+        order = np.arange(n)
+    top = order[:k]
+    order[:k] = top[np.argsort(-scores[top], kind="stable")]
+    return order
+
+
+# ------------------------- Selection Schemes -------------------------
+# Each scheme returns the two parent indices of `count` children. scores are
+# aligned with the population, whose first `parents` rows are its best,
+# sorted best first (see top_order).
+def truncation_selection(scores, count, parents, rng):
+    # Two distinct parents drawn uniformly from the best `parents`
+    parents = min(parents, len(scores))
+    first = rng.integers(parents, size=count)
+    second = (first + 1 + rng.integers(max(parents - 1, 1), size=count)) % parents
+    return first, second
+
+
+def tournament_selection(scores, count, parents, rng, size=2):
+    # Each parent is the best of `size` individuals drawn from the whole population
+    entrants = rng.integers(len(scores), size=(2, count, size))
+    winners = np.argmax(scores[entrants], axis=2)
+    return tuple(np.take_along_axis(entrants, winners[..., None], axis=2)[..., 0])
+
+
+def rank_selection(scores, count, parents, rng):
+    # Linear ranking: the individual at rank r (0 = best) is picked with
+    # probability proportional to n - r. Ranks are drawn by inverting the
+    # distribution. The draws reach most ranks, so one argsort is cheaper
+    # than an argpartition over that many kth values.
+    n = len(scores)
+    ranks = np.minimum((n * (1 - np.sqrt(rng.random((2, count))))).astype(np.int64), n - 1)
+    placed = np.argsort(-scores, kind="stable")
+    return placed[ranks[0]], placed[ranks[1]]
+
+
+SELECTIONS = {
+    "truncation": truncation_selection,
+    "tournament": tournament_selection,
+    "rank": rank_selection
+}
+
+
+# ------------------------- Batched Mutation -------------------------
+def mutate_population(catalogue, population, rng, rate=0.3):
+    # Mutates every row in place with one draw for the mask and one each for
+    # the new times and rooms of all mutated genes in the batch
+    rows, genes = np.nonzero(rng.random(population.shape) < rate)
+    times = rng.integers(catalogue.n_times, size=len(genes))
+    population[rows, genes] = catalogue.cells(times, catalogue.random_rooms(genes, rng))
+    return population
+
+
+# ------------------------- Breeding Pipeline -------------------------
+def breed(catalogue, population, out, rng, elite=10, parents=25, crossover="one_point", rate=0.3,
+          profiler=NULL_PROFILER, selection="truncation", scores=None):
+    # population's first max(elite, parents) rows must be its best, sorted best
+    # first; tournament and rank selection also need the population's scores.
+    # The next generation is written into the preallocated `out` buffer:
+    # copies of the elite, then children. out never shares memory with
+    # population, so mutating a child can't change an elite or its parents.
+    # Returns each child's two parent indices.
+    if crossover not in CROSSOVERS:
+        raise ValueError(f"Unknown crossover {crossover!r}, expected one of {tuple(CROSSOVERS)}")
+    if selection not in SELECTIONS:
+        raise ValueError(f"Unknown selection {selection!r}, expected one of {tuple(SELECTIONS)}")
+    if scores is None:
+        if selection != "truncation":
+            raise ValueError(f"{selection!r} selection needs the population's scores")
+        scores = np.zeros(len(population))
+    elite = min(elite, len(out))
+    out[:elite] = population[:elite]
+
+    children = out[elite:]
+    if len(children) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    with profiler.phase("selection"):
+        first, second = SELECTIONS[selection](scores, len(children), parents, rng)
+    with profiler.phase("crossover"):
+        CROSSOVERS[crossover](catalogue, population, first, second, children, rng)
+    with profiler.phase("mutation"):
+        mutate_population(catalogue, children, rng, rate)
+    return first, second
@@ -0,0 +1,64 @@
+import json
+
+from encoding import Catalogue
+from constraints import ConstraintEngine
+
+
+# ------------------------- Problem -------------------------
+# One timetabling problem: course requirements in the data.json schema plus
+# the days, time slots and rooms to schedule them into. The requirements are
+# expanded into sessions once here, the integer catalogue is built from that
+# list, and both are shared by every chromosome, so nothing re-reads or
+# re-expands the requirements per call.
+# Extra constraints (see constraints.py) are compiled into their lookup
+# tables here as well; constraint_list keeps them as given, so a changed
+# problem can be built with the same constraints.
+class Problem:
+    def __init__(self, course_requirements, days, time_slots, rooms_lecture, rooms_lab, constraints=None):
+        self.course_requirements = course_requirements
+        self.days = list(days)
+        self.time_slots = list(time_slots)
+        self.rooms_lecture = list(rooms_lecture)
+        self.rooms_lab = list(rooms_lab)
+        self.all_slots = [(d, s) for d in self.days for s in self.time_slots]
+        self.sessions = self._expand()
+        self.catalogue = Catalogue(course_requirements, self.sessions, self.days, self.time_slots,
+                                   self.rooms_lecture, self.rooms_lab)
+        self.constraint_list = list(constraints or [])
+        self.constraints = ConstraintEngine(self.catalogue, constraints) if constraints else None
+
+    def _expand(self):
+        expanded = []
+        for course, details in self.course_requirements.items():
+            if "lectures" in details:
+                for _ in range(details["lectures"]["hours"]):
+                    expanded.append({
+                        "course": course,
+                        "type": "lecture",
+                        "instructor": details["lectures"]["lecturer"]
+                    })
+            if "labs" in details:
+                for _ in range(details["labs"]["hours"]):
+                    expanded.append({
+                        "course": course,
+                        "type": "lab",
+                        "instructor": details["labs"]["ta"]
+                    })
+        return expanded
+
+    def rooms_for(self, lec_type):
+        return self.rooms_lab if lec_type == "lab" else self.rooms_lecture
+
+
+def load_problem(source, days, time_slots, rooms_lecture, rooms_lab, constraints=None):
+    # source may be a Problem, a requirements dict, a readable stream or a path
+    if isinstance(source, Problem):
+        return source
+    if isinstance(source, dict):
+        requirements = source
+    elif hasattr(source, "read"):
+        requirements = json.load(source)
+    else:
+        with open(source, "r") as f:
+            requirements = json.load(f)
+    return Problem(requirements, days, time_slots, rooms_lecture, rooms_lab, constraints)
@@ -0,0 +1,121 @@
+import cProfile
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+# ------------------------- Disabled Profiler -------------------------
+# Default for the GA loop: every hook is a no-op and phase() hands back one
+# shared null context, so a run without profiling pays only a method call.
+class NullProfiler:
+    enabled = False
+    _null = nullcontext()
+
+    def phase(self, name):
+        return self._null
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def start_generation(self):
+        pass
+
+    def end_generation(self, generation):
+        pass
+
+    def record_parents(self, scores, first, second, elite):
+        pass
+
+    def record_children(self, scores):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+# ------------------------- GA Profiler -------------------------
+# Counts time per phase (fitness, selection, local_search, crossover,
+# mutation), net allocated blocks per generation and the operator success
+# rate: the share of children scoring better than the better of their parents.
+# Optionally dumps cProfile stats and a tracemalloc snapshot when the run ends.
+class GAProfiler(NullProfiler):
+    enabled = True
+
+    def __init__(self, cprofile_path=None, tracemalloc_path=None):
+        self.cprofile_path = cprofile_path
+        self.tracemalloc_path = tracemalloc_path
+        self.phase_seconds = {}
+        self.phase_calls = {}
+        self.generations = []
+        self._profile = None
+        self._blocks = 0
+        self._generation_start = 0.0
+        self._parent_best = None
+        self._elite = 0
+        self._success_rate = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + time.perf_counter() - start
+            self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+
+    def start(self):
+        if self.tracemalloc_path and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+            self._profile = None
+        if self.tracemalloc_path and tracemalloc.is_tracing():
+            tracemalloc.take_snapshot().dump(self.tracemalloc_path)
+            tracemalloc.stop()
+
+    def start_generation(self):
+        self._blocks = sys.getallocatedblocks()
+        self._generation_start = time.perf_counter()
+
+    def end_generation(self, generation):
+        self.generations.append({
+            "generation": generation,
+            "seconds": time.perf_counter() - self._generation_start,
+            "allocated_blocks": sys.getallocatedblocks() - self._blocks,
+            "success_rate": self._success_rate
+        })
+        self._success_rate = None
+
+    def record_parents(self, scores, first, second, elite):
+        # scores are the sorted generation the parents were drawn from
+        self._parent_best = np.maximum(scores[first], scores[second])
+        self._elite = elite
+
+    def record_children(self, scores):
+        # scores of the next generation, in breeding order (before sorting)
+        if self._parent_best is None:
+            return
+        children = scores[self._elite:self._elite + len(self._parent_best)]
+        self._success_rate = float(np.mean(children > self._parent_best)) if len(children) else None
+        self._parent_best = None
+
+    def snapshot(self):
+        rates = [g["success_rate"] for g in self.generations if g["success_rate"] is not None]
+        return {
+            "phases": {name: {"seconds": self.phase_seconds[name], "calls": self.phase_calls[name]}
+                       for name in self.phase_seconds},
+            "generations": list(self.generations),
+            "success_rate": sum(rates) / len(rates) if rates else None
+        }
@@ -0,0 +1,125 @@
+import copy
+import time
+import numpy as np
+
+from encoding import decode_chromosome, match_schedule
+from fitness import FitnessTracker
+from local_search import tabu_search
+from problem import Problem
+
+
+# ------------------------- Applying Changes -------------------------
+# changes is a dict with any of:
+#   "courses": {name: new details in the data.json schema, or None to drop it}
+#   "instructors": {old name: new name}, e.g. a TA change
+#   "closed_rooms": [room, ...]
+def apply_changes(problem, changes):
+    requirements = copy.deepcopy(problem.course_requirements)
+    for name, details in changes.get("courses", {}).items():
+        if details is None:
+            requirements.pop(name, None)
+        else:
+            requirements[name] = details
+    renames = changes.get("instructors", {})
+    for details in requirements.values():
+        for key, who in (("lectures", "lecturer"), ("labs", "ta")):
+            if key in details and details[key][who] in renames:
+                details[key][who] = renames[details[key][who]]
+    closed = set(changes.get("closed_rooms", []))
+    # compile() stores a constraint's tables on the constraint itself, so the
+    # new problem gets copies rather than recompiling the old problem's objects
+    return Problem(requirements, problem.days, problem.time_slots,
+                   [r for r in problem.rooms_lecture if r not in closed],
+                   [r for r in problem.rooms_lab if r not in closed],
+                   [copy.copy(c) for c in problem.constraint_list])
+
+
+# ------------------------- Pinning -------------------------
+def _carry_over(catalogue, schedule, changed_courses):
+    # Matches the old schedule to the new sessions. Returns each session's old
+    # cell (-1 if it is new or its room closed), whether it existed before,
+    # and whether it can stay pinned: not in a changed course, same instructor
+    old_cells = np.full(catalogue.n_sessions, -1, dtype=np.int64)
+    existed = np.zeros(catalogue.n_sessions, dtype=bool)
+    pinned = np.zeros(catalogue.n_sessions, dtype=bool)
+    for lec, session, cell in match_schedule(catalogue, schedule, strict=False):
+        if session < 0:
+            continue
+        existed[session] = True
+        if cell < 0:
+            continue
+        old_cells[session] = cell
+        same_instructor = catalogue.instructors[catalogue.session_instructor[session]] == lec["instructor"]
+        pinned[session] = same_instructor and lec["course"] not in changed_courses
+    return old_cells, existed, pinned
+
+
+def _place(tracker, gene, rng, previous=-1):
+    # Puts one unpinned session in its previous cell if that adds no more
+    # clashes than any other, else in a random cell with the fewest clashes
+    catalogue = tracker.catalogue
+    cells = catalogue.type_cells[catalogue.session_type[gene]]
+    if len(cells) == 0:
+        cells = np.arange(catalogue.n_cells)
+    keys = cells // catalogue.n_rooms * catalogue.n_instructors + catalogue.session_instructor[gene]
+    clashes = (tracker.room_count[cells] > 0).astype(np.int64) + (tracker.instructor_count[keys] > 0)
+    options = cells[clashes == clashes.min()]
+    if previous >= 0 and previous in options:
+        tracker.move(gene, int(previous))
+    else:
+        tracker.move(gene, int(options[rng.integers(len(options))]))
+
+
+# ------------------------- Incremental Re-solve -------------------------
+def reschedule(problem, schedule, changes, seed=None, max_evaluations=5000, rounds=3):
+    # Re-solves only what the changes touch. Untouched sessions are pinned to
+    # their old cells; affected ones are placed greedily and repaired with tabu
+    # search. If clashes remain, pinned sessions clashing with them are
+    # released too, one conflict ring per round. Returns the new problem, the
+    # new schedule in dict form and a report with how many sessions moved.
+    # The search only repairs clashes; a constrained problem's violations of
+    # the new schedule are reported under constraint_violations.
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    new_problem = apply_changes(problem, changes)
+    catalogue = new_problem.catalogue
+
+    changed_courses = set(changes.get("courses", {}))
+    old_cells, existed, pinned = _carry_over(catalogue, schedule, changed_courses)
+    movable = ~pinned
+    affected = int(movable.sum())
+
+    # Pinned sessions keep their cells; affected ones start in a dummy cell
+    # and are moved into place against the pinned occupancy, those with a
+    # previous cell first so they get the best chance to keep it
+    chromosome = np.where(movable, 0, old_cells).astype(catalogue.dtype)
+    tracker = FitnessTracker(catalogue, chromosome)
+    genes = rng.permutation(np.flatnonzero(movable))
+    for gene in genes[np.argsort(old_cells[genes] < 0, kind="stable")]:
+        _place(tracker, int(gene), rng, int(old_cells[gene]))
+
+    for _ in range(rounds):
+        if tracker.clashes == 0:
+            break
+        tabu_search(catalogue, chromosome, rng, max_evaluations, movable=movable)
+        tracker = FitnessTracker(catalogue, chromosome)
+        if tracker.clashes == 0:
+            break
+        conflicted = tracker.conflicted_genes()
+        if movable[conflicted].all():
+            continue
+        movable[conflicted] = True
+
+    moved = int(np.count_nonzero(existed & (chromosome != old_cells)))
+    constraints = new_problem.constraints
+    report = {
+        "affected": affected,
+        "released": int(movable.sum()) - affected,
+        "moved": moved,
+        "room_clashes": tracker.room_clashes,
+        "instructor_clashes": tracker.instructor_clashes,
+        "constraint_violations": constraints.breakdown(constraints.violations(chromosome)[0])
+        if constraints is not None else {},
+        "seconds": time.perf_counter() - started
+    }
+    return new_problem, decode_chromosome(catalogue, chromosome), report
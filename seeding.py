@@ -0,0 +1,57 @@
+import numpy as np
+
+from encoding import random_chromosome
+
+
+# ------------------------- Constructive Seeder -------------------------
+# Places sessions most-constrained first: busiest instructors and scarcest
+# room types go before the rest, each session picks a random (time, room)
+# that is still free for both its room and its instructor, and the tables are
+# updated right away so later sessions only see cells that remain feasible.
+def greedy_chromosome(catalogue, rng):
+    n_types = len(catalogue.type_rooms)
+    room_free = np.ones((catalogue.n_times, catalogue.n_rooms), dtype=bool)
+    instructor_free = np.ones((catalogue.n_instructors, catalogue.n_times), dtype=bool)
+    free_rooms = np.array([np.full(catalogue.n_times, len(rooms)) for rooms in catalogue.type_rooms])
+
+    load = np.bincount(catalogue.session_instructor, minlength=catalogue.n_instructors)
+    demand = np.bincount(catalogue.session_type, minlength=n_types)
+    scarcity = demand / np.maximum([len(cells) for cells in catalogue.type_cells], 1)
+    tie_break = rng.random(catalogue.n_sessions)
+    order = np.lexsort((tie_break,
+                        -load[catalogue.session_instructor],
+                        -scarcity[catalogue.session_type]))
+
+    chromosome = np.empty(catalogue.n_sessions, dtype=catalogue.dtype)
+    for session in order:
+        t = catalogue.session_type[session]
+        instructor = catalogue.session_instructor[session]
+        rooms = catalogue.type_rooms[t]
+        if len(rooms) == 0:
+            rooms = np.arange(catalogue.n_rooms)
+
+        times = np.flatnonzero(instructor_free[instructor] & (free_rooms[t] > 0))
+        if len(times) == 0:
+            # Dead end: accept a room clash, or an instructor clash if even that fails
+            times = np.flatnonzero(instructor_free[instructor])
+            if len(times) == 0:
+                times = np.arange(catalogue.n_times)
+        time = times[rng.integers(len(times))]
+
+        open_rooms = rooms[room_free[time, rooms]]
+        room = open_rooms[rng.integers(len(open_rooms))] if len(open_rooms) else rooms[rng.integers(len(rooms))]
+
+        chromosome[session] = time * catalogue.n_rooms + room
+        if room_free[time, room]:
+            room_free[time, room] = False
+            free_rooms[catalogue.room_type[room], time] -= 1
+        instructor_free[instructor, time] = False
+    return chromosome
+
+
+def initial_population(catalogue, pop_size, rng, seed_fraction=0.0):
+    # The first round(seed_fraction * pop_size) individuals are built greedily
+    n_seeded = int(round(seed_fraction * pop_size))
+    population = [greedy_chromosome(catalogue, rng) for _ in range(n_seeded)]
+    population += [random_chromosome(catalogue, rng) for _ in range(pop_size - n_seeded)]
+    return np.stack(population)
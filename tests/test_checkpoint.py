@@ -0,0 +1,41 @@
+import pytest
+
+from benchmark import synthetic_problem
+from main import genetic_algorithm
+
+CONFIGS = {
+    "truncation": {},
+    "rank": {"selection": "rank"},
+    "tournament_order": {"selection": "tournament", "crossover": "order"},
+    "anneal": {"local_search": "anneal", "elite": 4}
+}
+
+
+# ------------------------- Resume -------------------------
+def recorder(snapshots, stop_at=None):
+    # Keeps what depends on the whole population, not just the best score,
+    # and stops the run at generation stop_at
+    def on_generation(snapshot):
+        snapshots.append((snapshot["generation"], snapshot["best_fitness"], snapshot["mean_fitness"],
+                          snapshot["worst_fitness"], snapshot["best"].tolist()))
+        return snapshot["generation"] == stop_at
+    return on_generation
+
+
+@pytest.mark.parametrize("options", CONFIGS.values(), ids=CONFIGS.keys())
+def test_resumed_run_matches_uninterrupted_run(tmp_path, options):
+    problem = synthetic_problem(80, 10, contention=1.0)
+    run = dict(pop_size=40, generations=20, seed=7, problem=problem, **options)
+    full = []
+    schedule, history = genetic_algorithm(on_generation=recorder(full), **run)
+    assert len(history) == 20
+
+    # Stop at generation 8, right after the checkpoint written at the end of
+    # generation 7, then continue from it
+    path = str(tmp_path / "run.npz")
+    genetic_algorithm(checkpoint_path=path, checkpoint_every=4, on_generation=recorder([], stop_at=8), **run)
+    resumed = []
+    resumed_schedule, resumed_history = genetic_algorithm(resume=path, on_generation=recorder(resumed), **run)
+    assert resumed == full[8:]
+    assert resumed_history == history
+    assert resumed_schedule == schedule
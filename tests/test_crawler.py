@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import crawl as crawl_async, run_crawl
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "books")
+EXPECTED = {
+    "A Light in the Attic": ("1", "£51.77", "In stock", "It's hard to imagine a world without A Light in the Attic."),
+    "Tipping the Velvet": ("1", "£53.74", "In stock", "Erotic and absorbing... Written with starling power."),
+    "Soumission": ("1", "£50.10", "In stock", "Dans une France assez proche de la nôtre."),
+    "Sharp Objects": ("2", "£47.82", "In stock", "WICKED above her hipbone, GIRL across her heart."),
+    "The Requiem Red": ("2", "£22.65", "Out of stock", "Patient Twenty-nine."),
+    "Sapiens: A Brief History of Humankind & Us": (
+        "2", "£54.23", "In stock", 'From a renowned historian comes a "groundbreaking" narrative.')
+}
+
+
+# ------------------------- Fixture Server -------------------------
+# Serves a copy of the fixture site with a content-hash ETag and answers
+# a matching If-None-Match with 304, like the real site. Every request's
+# path and If-None-Match header is recorded.
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = os.path.join(self.server.root, self.path.lstrip("/"))
+        self.server.seen.append((self.path, self.headers.get("If-None-Match")))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "site"
+    shutil.copytree(FIXTURES, root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.root, server.seen = str(root), []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/catalogue/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(site, **options):
+    out = io.StringIO()
+    stats = run_crawl(out, pages=2, base_url=site.base_url, concurrency=4, retries=0, **options)
+    return stats, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def by_name(items):
+    return {item["Book Name"]: (item["Page Number"], item["Price"], item["Stock Availability"],
+                                item["Description"]) for item in items}
+
+
+# ------------------------- Tests -------------------------
+def test_crawl_fields_and_page_numbers(site):
+    stats, items = crawl(site)
+    assert stats["failed"] == []
+    assert (stats["pages"], stats["books"], stats["items"]) == (2, 6, 6)
+    assert by_name(items) == EXPECTED
+
+
+def test_run_crawl_in_running_loop_points_to_crawl(site):
+    # As in a notebook cell: asyncio.run() can't be used, awaiting crawl() can
+    async def cell():
+        with pytest.raises(RuntimeError, match="await crawl"):
+            run_crawl(io.StringIO(), pages=2, base_url=site.base_url)
+        out = io.StringIO()
+        stats = await crawl_async(out, pages=2, base_url=site.base_url, concurrency=4, retries=0)
+        return stats, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    stats, items = asyncio.run(cell())
+    assert stats["items"] == 6
+    assert by_name(items) == EXPECTED
+
+
+def test_unchanged_recrawl_is_conditional(site, tmp_path):
+    cache_path = str(tmp_path / "cache.sqlite")
+    crawl(site, cache_path=cache_path, incremental=True)
+    site.seen.clear()
+
+    stats, items = crawl(site, cache_path=cache_path, incremental=True)
+    assert items == []
+    assert stats["unchanged"] == 6
+    assert stats["cache_hits"] == stats["pages"] == stats["unchanged_pages"] == 2
+    assert stats["bytes"] == 0
+    assert len(site.seen) == 2 and all(etag for _, etag in site.seen)
+
+
+def test_price_edit_reemits_only_changed_books(site, tmp_path):
+    cache_path = str(tmp_path / "cache.sqlite")
+    crawl(site, cache_path=cache_path, incremental=True)
+    page = os.path.join(site.root, "catalogue", "page-2.html")
+    with open(page, encoding="utf-8") as f:
+        html = f.read()
+    with open(page, "w", encoding="utf-8") as f:
+        f.write(html.replace("£22.65", "£19.99"))
+
+    stats, items = crawl(site, cache_path=cache_path, incremental=True)
+    assert by_name(items) == {"The Requiem Red": ("2", "£19.99", "Out of stock", "Patient Twenty-nine.")}
+    assert stats["unchanged"] == 5
+    assert (stats["cache_hits"], stats["unchanged_pages"]) == (2, 1)
@@ -0,0 +1,38 @@
+import random
+
+import numpy as np
+
+from benchmark import synthetic_problem
+from enrollment import Enrollment
+from main import random_population
+
+
+def brute_force_clashes(catalogue, students, chromosome):
+    # Pairs of each student's sessions placed at the same time
+    total = 0
+    times = np.asarray(chromosome, dtype=np.int64) // catalogue.n_rooms
+    for courses in students.values():
+        taken = [catalogue.courses.index(c) for c in set(courses) if c in catalogue.courses]
+        counts = np.bincount(times[np.isin(catalogue.session_course, taken)])
+        total += int((counts * (counts - 1) // 2).sum())
+    return total
+
+
+def test_population_clashes_match_per_student_count():
+    problem = synthetic_problem(40, 15)
+    catalogue = problem.catalogue
+    rng = random.Random(0)
+    students = {f"s{i}": rng.sample(catalogue.courses, rng.randint(0, 6)) + ["unknown"] for i in range(300)}
+    enrollment = Enrollment(catalogue, students)
+    population = random_population(catalogue, 20, np.random.default_rng(0))
+
+    clashes = enrollment.population_clashes(population)
+    expected = [brute_force_clashes(catalogue, students, row) for row in population]
+    assert clashes.tolist() == expected
+    assert [int(enrollment.student_clashes(row).sum()) for row in population] == expected
+
+
+def test_population_clashes_without_students():
+    catalogue = synthetic_problem(10, 5).catalogue
+    population = random_population(catalogue, 3, np.random.default_rng(0))
+    assert Enrollment(catalogue, {}).population_clashes(population).tolist() == [0, 0, 0]
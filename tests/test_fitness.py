@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from benchmark import synthetic_problem
+from encoding import decode_chromosome
+from fitness import population_clashes, population_fitness
+from main import calculate_fitness, load_problem, random_population
+
+
+# ------------------------- Vectorized Scoring -------------------------
+@pytest.mark.parametrize("problem", [load_problem(), synthetic_problem(40, 15), synthetic_problem(300, 90)],
+                         ids=["data.json", "small", "medium"])
+def test_population_clashes_match_calculate_fitness(problem):
+    catalogue = problem.catalogue
+    rng = np.random.default_rng(0)
+    # Seeded individuals have few clashes, uniformly random cells many
+    population = np.concatenate((
+        random_population(catalogue, 20, rng, seed_fraction=0.5),
+        rng.integers(catalogue.n_cells, size=(20, catalogue.n_sessions)).astype(catalogue.dtype)))
+
+    room_clashes, instructor_clashes = population_clashes(catalogue, population)
+    expected = np.array([calculate_fitness(decode_chromosome(catalogue, row)) for row in population])
+    # Compared as clash counts: fitness values a clash apart are too close for a tolerance
+    assert (np.rint(1 / expected) - 2).astype(np.int64).tolist() == (room_clashes + instructor_clashes).tolist()
+    assert np.array_equal(population_fitness(catalogue, population), expected)
+    assert (room_clashes + instructor_clashes).max() > 0
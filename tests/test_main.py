@@ -0,0 +1,18 @@
+import numpy as np
+
+from benchmark import synthetic_problem
+from main import generation_stream, random_population, score_population
+
+
+# ------------------------- Snapshots -------------------------
+def test_worst_fitness_is_population_minimum():
+    # Only the best max(elite, parents) rows are sorted, so the worst score
+    # can sit anywhere in the unsorted tail
+    problem = synthetic_problem(300, 90)
+    catalogue = problem.catalogue
+    population = random_population(catalogue, 300, np.random.default_rng(0))
+    scores = score_population(catalogue, population)[0]
+
+    snapshot = next(generation_stream(catalogue, population, np.random.default_rng(1), 1))
+    assert snapshot["worst_fitness"] == scores.min()
+    assert snapshot["best_fitness"] == scores.max()
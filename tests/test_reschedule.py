@@ -0,0 +1,40 @@
+import numpy as np
+
+from constraints import InstructorAvailability, RoomType
+from encoding import encode_schedule
+from main import genetic_algorithm, load_problem, score_population
+from reschedule import apply_changes, reschedule
+
+
+def constrained_problem():
+    problem = load_problem()
+    instructor = problem.sessions[0]["instructor"]
+    unavailable = InstructorAvailability({instructor: [(problem.days[0], slot) for slot in problem.time_slots]})
+    return load_problem(problem.course_requirements, constraints=[RoomType(), unavailable])
+
+
+def test_changed_problem_keeps_constraints():
+    problem = constrained_problem()
+    wrong_room = problem.constraints.constraints[0].wrong_room.copy()
+    changed = apply_changes(problem, {"closed_rooms": [problem.rooms_lecture[0]]})
+
+    assert changed.constraints is not None
+    assert changed.constraints.names == problem.constraints.names
+    assert changed.catalogue.n_rooms == problem.catalogue.n_rooms - 1
+    # Compiling for the new problem leaves the old problem's tables alone
+    assert np.array_equal(problem.constraints.constraints[0].wrong_room, wrong_room)
+
+
+def test_reschedule_reports_constraint_violations():
+    problem = constrained_problem()
+    schedule, _ = genetic_algorithm(pop_size=20, generations=10, seed=0, problem=problem)
+    changed, new_schedule, report = reschedule(problem, schedule, {"closed_rooms": [problem.rooms_lab[0]]}, seed=0)
+
+    chromosome = encode_schedule(changed.catalogue, new_schedule)
+    violations = changed.constraints.violations(chromosome)
+    assert report["constraint_violations"] == changed.constraints.breakdown(violations[0])
+
+    scores, room_clashes, instructor_clashes, _ = score_population(changed.catalogue, chromosome[None],
+                                                                   changed.constraints)
+    penalty = room_clashes + instructor_clashes + changed.constraints.penalties(violations)
+    assert np.allclose(scores, 1 / (2 + penalty))